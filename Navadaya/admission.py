@@ -0,0 +1,322 @@
+"""
+Cross-worker admission control for the PDF renders.
+
+render_pool bounds renders per gunicorn worker, but every worker has its
+own pool, and request threads queue in its lanes for up to the lane
+timeout. A few admins asking for the all-students report at once could so
+hold every thread of every worker and leave ``/health`` unanswered until
+the container healthcheck restarted it. Renders now first take a lease
+from an admission controller whose state is a small SQLite database shared
+by all workers on the host (``ADMISSION_PATH``):
+
+* Each render lane belongs to a group (``ADMISSION_ROUTES``) with a budget
+  of weight units in flight across all workers, a wait-queue cap and a
+  maximum wait (``ADMISSION_GROUPS``).
+* A render weighs one unit per ``ADMISSION_WEIGHT_UNIT`` students or
+  receipts in its payload, at most the whole budget, so a huge report
+  still runs, alone.
+* Renders that do not fit wait in arrival order. When the queue is full or
+  the wait runs out the request is refused with a 429 and a
+  ``Retry-After`` estimated from how long the group's leases are held.
+* Receipts and single-student reports form their own group, so heavy
+  reports can never use up their budget. Within each gunicorn worker a
+  group also leaves ``ADMISSION_RESERVED_THREADS`` request threads free
+  (heavy reports three, receipts one), so receipts, and ``/health`` and
+  ``/ready``, which never take a lease, always find a thread.
+
+Leases of a process that died are dropped by the next acquire, and a lease
+older than ``ADMISSION_LEASE_TTL`` is treated as leaked. gunicorn.conf.py
+starts every server run with an empty database, as pids repeat across
+container restarts.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from config import get_config
+from metrics import ADMISSION_WAIT_SECONDS, ADMISSION_REJECTIONS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    grp TEXT NOT NULL,
+    weight INTEGER NOT NULL,
+    pid INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    created REAL NOT NULL,
+    acquired REAL
+);
+CREATE INDEX IF NOT EXISTS leases_by_group ON leases (grp, state, id);
+CREATE TABLE IF NOT EXISTS hold_times (grp TEXT PRIMARY KEY, seconds REAL NOT NULL);
+"""
+
+WAITING, HELD = 'waiting', 'held'
+# Waiters poll the database, backing off from the first to the second interval (seconds)
+POLL_INTERVALS = (0.02, 0.25)
+# Weight of the newest hold time in a group's moving average
+HOLD_TIME_SMOOTHING = 0.2
+RETRY_AFTER_MAX = 120
+
+class AdmissionRejected(Exception):
+    """Raised when a render is refused; ``retry_after`` is the suggested wait in whole seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class Lease:
+    """A granted share of a group's budget; release it (or use it as a context manager) when done"""
+
+    def __init__(self, controller, lease_id, group, weight, request_thread=False):
+        self.controller = controller
+        self.lease_id = lease_id
+        self.group = group
+        self.weight = weight
+        self.request_thread = request_thread
+        self.acquired = time.time()
+
+    def release(self):
+        if self.lease_id is not None:
+            lease_id, self.lease_id = self.lease_id, None
+            self.controller._release(lease_id, self.group, time.time() - self.acquired, self.request_thread)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+class AdmissionController:
+    """Weighted, cross-process render budgets kept in SQLite"""
+
+    def __init__(self, path, groups, routes, weight_unit=100, lease_ttl=1800, reserved_threads=None,
+                 timeout=10.0):
+        self.path = path
+        self.groups = groups
+        self.routes = routes
+        self.weight_unit = weight_unit
+        self.lease_ttl = lease_ttl
+        self.reserved_threads = reserved_threads or {}
+        self.timeout = timeout
+        # Request threads of this process that a group may fill (holding or waiting); None is unlimited
+        self.thread_limits = {}
+        self._threads_busy = 0
+        self._threads_lock = threading.Lock()
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection.executescript(SCHEMA)
+
+    @property
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit; every decision runs in an explicit BEGIN IMMEDIATE transaction
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self.connection
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def limit_threads(self, threads):
+        """Keep ``reserved_threads[group]`` of this worker's ``threads`` request threads free of ``group``"""
+        self.thread_limits = {group: max(1, threads - self.reserved_threads.get(group, 0)) for group in self.groups}
+
+    def weight(self, route, count):
+        """Units a render of ``count`` students (or receipts) on ``route`` takes from its group"""
+        group = self.routes.get(route)
+        if group is None:
+            return 1
+        return max(1, min(math.ceil(count / self.weight_unit), self.groups[group][0]))
+
+    def acquire(self, route, weight=1, wait=None, background=False):
+        """Take ``weight`` units of ``route``'s group, waiting up to the group's limit (or ``wait``)
+
+        Raises AdmissionRejected when this worker has no request thread to
+        spare for the group, the wait queue is full or the wait runs out.
+        ``background`` acquisitions (report jobs) run on their own threads
+        and always queue. Routes without a group get a lease that holds
+        nothing.
+        """
+        group = self.routes.get(route)
+        if group is None:
+            return Lease(self, None, route, 0)
+        request_thread = not background
+        if request_thread:
+            self._enter_thread(group, route, weight)
+        try:
+            lease_id = self._take(group, route, weight, wait, background)
+        except BaseException:
+            if request_thread:
+                self._leave_thread()
+            raise
+        return Lease(self, lease_id, group, weight, request_thread)
+
+    def _enter_thread(self, group, route, weight):
+        limit = self.thread_limits.get(group)
+        with self._threads_lock:
+            if limit is None or self._threads_busy < limit:
+                self._threads_busy += 1
+                return
+        with self._transaction() as conn:
+            rejected = self._rejection(conn, group, weight, 'threads', f"Too many {route} requests in progress")
+        raise rejected
+
+    def _leave_thread(self):
+        with self._threads_lock:
+            self._threads_busy -= 1
+
+    def _take(self, group, route, weight, wait, background):
+        """Insert a held lease for ``group``, queueing for it when needed; returns the lease id"""
+        budget, max_waiting, max_wait = self.groups[group]
+        weight = max(1, min(weight, budget))
+        started = time.monotonic()
+        deadline = started + (max_wait if wait is None else wait)
+
+        with self._transaction() as conn:
+            self._purge(conn)
+            if self._fits(conn, group, weight, budget):
+                lease_id = conn.execute(
+                    'INSERT INTO leases (grp, weight, pid, state, created, acquired) VALUES (?, ?, ?, ?, ?, ?)',
+                    (group, weight, os.getpid(), HELD, time.time(), time.time())).lastrowid
+                self._granted(group, started)
+                return lease_id
+            waiting = conn.execute('SELECT COUNT(*) FROM leases WHERE grp = ? AND state = ?',
+                                   (group, WAITING)).fetchone()[0]
+            rejected = None
+            if not background and waiting >= max_waiting:
+                rejected = self._rejection(conn, group, weight, 'queue_full', f"Too many pending {route} requests")
+            else:
+                lease_id = conn.execute(
+                    'INSERT INTO leases (grp, weight, pid, state, created) VALUES (?, ?, ?, ?, ?)',
+                    (group, weight, os.getpid(), WAITING, time.time())).lastrowid
+        if rejected is not None:
+            raise rejected
+
+        interval = POLL_INTERVALS[0]
+        try:
+            while True:
+                time.sleep(max(0.0, min(interval, deadline - time.monotonic())))
+                interval = min(interval * 2, POLL_INTERVALS[1])
+                with self._transaction() as conn:
+                    self._purge(conn)
+                    if self._fits(conn, group, weight, budget, lease_id):
+                        conn.execute('UPDATE leases SET state = ?, acquired = ? WHERE id = ?',
+                                     (HELD, time.time(), lease_id))
+                        self._granted(group, started)
+                        granted, lease_id = lease_id, None
+                        return granted
+                    if time.monotonic() >= deadline:
+                        conn.execute('DELETE FROM leases WHERE id = ?', (lease_id,))
+                        lease_id = None
+                        rejected = self._rejection(conn, group, weight, 'wait_timeout',
+                                                   f"Timed out waiting to render {route}")
+                if rejected is not None:
+                    raise rejected
+        finally:
+            if lease_id is not None:
+                # Interrupted while waiting: give up the place in the queue
+                with self._transaction() as conn:
+                    conn.execute('DELETE FROM leases WHERE id = ?', (lease_id,))
+
+    def _granted(self, group, started):
+        ADMISSION_WAIT_SECONDS.labels(group).observe(time.monotonic() - started)
+
+    def _fits(self, conn, group, weight, budget, lease_id=None):
+        """Whether ``weight`` more units fit and no earlier waiter of the group is still queued"""
+        held, first_waiting = conn.execute(
+            'SELECT COALESCE(SUM(CASE WHEN state = ? THEN weight END), 0), '
+            'MIN(CASE WHEN state = ? THEN id END) FROM leases WHERE grp = ?',
+            (HELD, WAITING, group)).fetchone()
+        if first_waiting is not None and (lease_id is None or first_waiting < lease_id):
+            return False
+        return held + weight <= budget
+
+    def _rejection(self, conn, group, weight, reason, message):
+        ADMISSION_REJECTIONS.labels(group, reason).inc()
+        return AdmissionRejected(f"{message}, please retry shortly", self._retry_after(conn, group, weight))
+
+    def _retry_after(self, conn, group, weight):
+        """Seconds until roughly the queued and held work of ``group`` plus ``weight`` has drained"""
+        budget, _, max_wait = self.groups[group]
+        row = conn.execute('SELECT seconds FROM hold_times WHERE grp = ?', (group,)).fetchone()
+        hold = row[0] if row else max_wait
+        queued = conn.execute('SELECT COALESCE(SUM(weight), 0) FROM leases WHERE grp = ? AND state = ?',
+                              (group, WAITING)).fetchone()[0]
+        return max(1, min(RETRY_AFTER_MAX, math.ceil(hold * (queued + weight) / budget)))
+
+    def _purge(self, conn):
+        """Drop leases of processes that died and leases older than the TTL"""
+        conn.execute('DELETE FROM leases WHERE created < ?', (time.time() - self.lease_ttl,))
+        pids = [pid for (pid,) in conn.execute('SELECT DISTINCT pid FROM leases')]
+        dead = [(pid,) for pid in pids if not _alive(pid)]
+        if dead:
+            conn.executemany('DELETE FROM leases WHERE pid = ?', dead)
+
+    def _release(self, lease_id, group, held_for, request_thread=False):
+        if request_thread:
+            self._leave_thread()
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM leases WHERE id = ?', (lease_id,))
+            conn.execute(
+                'INSERT INTO hold_times (grp, seconds) VALUES (?, ?) ON CONFLICT (grp) DO UPDATE '
+                'SET seconds = seconds * ? + excluded.seconds * ?',
+                (group, held_for, 1 - HOLD_TIME_SMOOTHING, HOLD_TIME_SMOOTHING))
+
+    def release_pid(self, pid):
+        """Drop every lease of ``pid`` (a worker that exited)"""
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM leases WHERE pid = ?', (pid,))
+
+    def status(self):
+        """Units held and waiting per group, with its budget"""
+        rows = self.connection.execute(
+            'SELECT grp, state, COALESCE(SUM(weight), 0), COUNT(*) FROM leases GROUP BY grp, state').fetchall()
+        status = {group: {'budget': budget, 'held': 0, 'waiting': 0, 'waitingRequests': 0}
+                  for group, (budget, _, _) in self.groups.items()}
+        for group, state, units, count in rows:
+            if group in status:
+                status[group][state] = units
+                if state == WAITING:
+                    status[group]['waitingRequests'] = count
+        return status
+
+_admission = None
+_admission_pid = None
+_admission_lock = threading.Lock()
+
+def get_admission():
+    """Return this process's admission controller, creating it after any fork"""
+    global _admission, _admission_pid
+    with _admission_lock:
+        if _admission is None or _admission_pid != os.getpid():
+            settings = get_config()
+            _admission = AdmissionController(settings.ADMISSION_PATH, settings.ADMISSION_GROUPS,
+                                             settings.ADMISSION_ROUTES, settings.ADMISSION_WEIGHT_UNIT,
+                                             settings.ADMISSION_LEASE_TTL, settings.ADMISSION_RESERVED_THREADS)
+            _admission_pid = os.getpid()
+        return _admission
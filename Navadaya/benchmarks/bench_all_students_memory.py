@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: all-students report, whole story vs sectioned build
+
+Renders the all-students report for growing hostels, once with the whole
+story built before doc.build (section size 0, the old behaviour) and once
+with students turned into flowables REPORT_SECTION_STUDENTS at a time.
+Each render runs in a fresh process and reports how far peak RSS rose
+above the RSS after the payload was built, so the payload itself is not
+counted.
+
+Usage: python benchmarks/bench_all_students_memory.py [--section N] [students ...]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+HERE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, HERE)
+
+def make_payload(students):
+    room = {'id': 'room-1', 'roomNumber': '101', 'monthlyRent': 5000}
+    return {'studentsData': [{
+        'student': {
+            'id': f"student-{i}",
+            'firstName': f"Student{i}",
+            'lastName': 'Test',
+            'rollNumber': f"R{i:05d}",
+            'course': 'B.Sc',
+            'year': 2,
+            'email': f"student{i}@example.com",
+            'phone': '9999999999',
+            'guardianName': 'Guardian',
+            'guardianPhone': '8888888888',
+        },
+        'fees': [{
+            'studentId': f"student-{i}",
+            'amount': 5000,
+            'status': ('paid', 'pending', 'overdue')[month % 3],
+            'month': month,
+            'year': 2025,
+        } for month in range(1, 7)],
+        'room': room if i % 4 else None,
+    } for i in range(students)]}
+
+def measure(students, section_size):
+    """Run in a child process: render once and print 'rss_growth_kb seconds pdf_bytes'"""
+    from pdf_reports import render_all_students_report, warm_up
+    warm_up()
+    payload = make_payload(students)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    pdf, _ = render_all_students_report(payload, section_size=section_size)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pdf.discard()
+    print(peak - baseline, elapsed, pdf.size)
+
+def run(students, section_size):
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', str(students), str(section_size)],
+        check=True, capture_output=True, text=True, cwd=HERE,
+    ).stdout.split()
+    return int(output[0]), float(output[1]), int(output[2])
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        measure(int(sys.argv[2]), int(sys.argv[3]))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('students', nargs='*', type=int, default=[100, 1_000, 5_000, 10_000])
+    parser.add_argument('--section', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'students':>9}  {'PDF':>8}  {'whole story':>12} {'time':>7}  {'sectioned':>10} {'time':>7}")
+    for count in args.students:
+        whole_kb, whole_time, size = run(count, 0)
+        sectioned_kb, sectioned_time, _ = run(count, args.section)
+        print(f"{count:>9}  {size / 1e6:>5.1f} MB  {whole_kb / 1024:>9.1f} MB {whole_time:>6.1f}s"
+              f"  {sectioned_kb / 1024:>7.1f} MB {sectioned_time:>6.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark: fresh interpreter to first /health response
+
+Starts a new Python process per run that imports main and answers one
+``/health`` request through the Flask test client, which is what a
+scale-to-zero deployment pays before its first response. Prints the
+median import time, first-request time and whole-process wall time, and
+which of the PDF libraries (ReportLab, qrcode, PIL, NumPy) were loaded
+along the way. With ``--baseline REV`` the same runs are made against the
+app as of that git revision (e.g. the commit before lazy PDF imports), for
+a before/after comparison.
+
+Usage: python benchmarks/bench_cold_start.py [--runs 15] [--baseline REV]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.abspath(os.path.join(HERE, '..'))
+PDF_LIBRARIES = ('pdf_reports', 'reportlab', 'qrcode', 'PIL', 'numpy')
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+response = main.app.test_client().get('/health')
+answered = time.perf_counter()
+print(json.dumps({{
+    'status': response.status_code,
+    'import': imported - started,
+    'health': answered - imported,
+    'loaded': [name for name in {PDF_LIBRARIES!r} if name in sys.modules],
+}}))
+"""
+
+def checkout(revision, directory):
+    """Extract the app directory as of ``revision`` into ``directory``"""
+    # Run from the app directory, git archive stores paths relative to it
+    archive = subprocess.run(['git', 'archive', revision, '.'], cwd=APP_DIR, check=True, capture_output=True).stdout
+    subprocess.run(['tar', '-x', '-C', directory], input=archive, check=True)
+    return directory
+
+def measure(app_dir, runs):
+    samples = []
+    # The first run compiles bytecode (a fresh checkout has none yet); leave it out
+    for _ in range(runs + 1):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', PROBE], cwd=app_dir, check=True, capture_output=True, text=True)
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        sample['wall'] = time.perf_counter() - started
+        if sample['status'] != 200:
+            raise RuntimeError(f"/health answered {sample['status']} in {app_dir}")
+        samples.append(sample)
+    return samples[1:]
+
+def report(label, samples):
+    median = {key: statistics.median(sample[key] for sample in samples) * 1000 for key in ('import', 'health', 'wall')}
+    loaded = ', '.join(samples[-1]['loaded']) or 'none'
+    print(f"{label:<10} {median['import']:>10.1f} {median['health']:>12.1f} {median['wall']:>10.1f}   {loaded}")
+    return median
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--baseline', help="git revision to compare against")
+    args = parser.parse_args()
+
+    print(f"Median of {args.runs} fresh processes (ms)")
+    print(f"{'':<10} {'import main':>10} {'first /health':>12} {'process':>10}   PDF libraries loaded")
+    workdir = tempfile.mkdtemp(prefix='navadaya-cold-start-')
+    try:
+        if args.baseline:
+            before = report(args.baseline[:10], measure(checkout(args.baseline, workdir), args.runs))
+        after = report('current', measure(APP_DIR, args.runs))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if args.baseline:
+        print(f"\nimport main: {before['import'] - after['import']:.1f} ms faster, "
+              f"whole process: {before['wall'] - after['wall']:.1f} ms faster")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Dataset snapshot: request sizes and payload build time, full payload vs sync
+
+For each hostel size, loads the synthetic dataset into a scratch SQLite
+dataset store and compares what the reports page sends per report before
+(the full JSON payload, decoded by the server) and after (one delta sync
+of ~1% changed fees, then a filters-only report request answered from the
+snapshot). Also checks that the payloads built from the snapshot equal the
+ones the page builds, for several filters; any mismatch exits with status 1.
+
+Usage: python benchmarks/bench_dataset_sync.py [scales ...]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dataset import DatasetSnapshot, SQLiteSource
+from synthetic_data import make_hostel, all_students_payload, fees_report_payload
+
+FILTERS = ({}, {'year': '2025'}, {'month': '3'}, {'status': 'paid', 'feeType': 'monthly_rent'})
+
+def page_all_students(students, fees, rooms, filters):
+    """studentsData as js/reports.js filters it"""
+    payload = all_students_payload(students, fees, rooms, filters)
+    for field in ('year', 'month'):
+        if filters.get(field):
+            payload['studentsData'] = [data for data in payload['studentsData']
+                                       if any(str(fee.get(field)) == str(filters[field]) for fee in data['fees'])]
+    return payload
+
+def page_fees(students, fees, rooms, filters):
+    for field in ('year', 'month'):
+        if filters.get(field):
+            fees = [fee for fee in fees if str(fee.get(field)) == str(filters[field])]
+    for field in ('status', 'feeType'):
+        if filters.get(field):
+            fees = [fee for fee in fees if fee.get(field) == filters[field]]
+    if filters:
+        student_ids = {fee['studentId'] for fee in fees}
+        students = [student for student in students if student['id'] in student_ids]
+    return fees_report_payload(students, fees, rooms, filters)
+
+def best_of(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run(scale, directory):
+    students, fees, rooms = make_hostel(scale)
+    snapshot = DatasetSnapshot(SQLiteSource(os.path.join(directory, f"dataset-{scale}.sqlite3")))
+    started = time.perf_counter()
+    snapshot.sync({'students': students, 'fees': fees, 'rooms': rooms}, reset=True)
+    initial_sync = time.perf_counter() - started
+
+    # A month of edits: ~1% of fees change status
+    changed = {fee['id']: dict(fee, status='paid') for fee in fees[::100]}
+    fees = [changed.get(fee['id'], fee) for fee in fees]
+    changed = list(changed.values())
+    delta = {'cursor': {'epoch': snapshot.epoch, 'version': snapshot.version}, 'upserts': {'fees': changed}}
+    snapshot.sync(delta['upserts'], cursor=delta['cursor'])
+    cursor = {'epoch': snapshot.epoch, 'version': snapshot.version}
+
+    mismatches = 0
+    for filters in FILTERS:
+        for kind, expected in (('all-students-report', page_all_students(students, fees, rooms, filters)),
+                               ('fees-report', page_fees(students, fees, rooms, filters))):
+            if snapshot.report_payload(kind, filters, cursor)[0] != expected:
+                print(f"  MISMATCH: {kind} {filters} at {scale} students")
+                mismatches += 1
+
+    full = json.dumps(fees_report_payload(students, fees, rooms)).encode()
+    request = json.dumps({'dataset': cursor, 'filters': {}}).encode()
+    decode = best_of(lambda: json.loads(full))
+    build = best_of(lambda: snapshot.report_payload('fees-report', {}, cursor))
+    print(f"{scale:>8} {len(fees):>8} {len(full) / 1024:>12.0f} {len(json.dumps(delta)) / 1024:>10.1f} "
+          f"{len(request):>9} {decode * 1000:>11.1f} {build * 1000:>11.2f} {initial_sync:>9.2f}")
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('scales', nargs='*', type=int, default=[100, 1_000, 5_000])
+    args = parser.parse_args()
+
+    print(f"{'students':>8} {'fees':>8} {'full KiB':>12} {'delta KiB':>10} {'request B':>9} "
+          f"{'decode ms':>11} {'snapshot ms':>11} {'sync s':>9}")
+    directory = tempfile.mkdtemp(prefix='navadaya-dataset-')
+    try:
+        mismatches = sum(run(scale, directory) for scale in args.scales)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Exports: time to first byte, total time and memory of the CSV/XLSX exports
+
+Runs the /api/export/fees and /api/export/students views on a synthetic
+hostel (~100k fees at the default 4850 students), with the payload
+already decoded, and consumes the streamed response chunk by chunk into a
+temp file, as a client would. Prints the time to the first chunk, the
+total time, the output size and the tracemalloc peak while streaming (on
+top of the payload, from a second, traced run). Row counts are checked (XLSX ones when openpyxl is
+installed); any mismatch exits with status 1. With ``--pdf`` the fees
+report PDF is rendered from the same payload for comparison.
+
+Usage: python benchmarks/bench_exports.py [--students 4850] [--pdf]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('RENDER_POOL_WORKERS', '0')
+os.environ.setdefault('REPORT_CACHE_MAX_ENTRIES', '0')
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - only used to check the XLSX output
+    openpyxl = None
+
+from flask import g
+
+from main import app, export_response
+from synthetic_data import make_hostel, fees_report_payload, all_students_payload
+
+def stream(export, kind, payload, export_format, output, trace=False):
+    """Stream one export into ``output``: ``(seconds to first chunk, seconds in total, bytes, peak bytes)``"""
+    with app.test_request_context(f"/api/export/{export}?format={export_format}", method='POST'):
+        # Hand the view the payload already decoded, so only the export itself is measured
+        g.json_body = payload
+        g.json_body_seconds = 0.0
+        if trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        response = export_response(export, kind)
+        first_byte = None
+        size = 0
+        for chunk in response.response:
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(chunk)
+            output.write(chunk)
+        total = time.perf_counter() - started
+        peak = 0
+        if trace:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        response.close()
+    return first_byte, total, size, peak
+
+def data_rows(path, export_format):
+    if export_format == 'csv':
+        with open(path, 'rb') as f:
+            return sum(1 for _ in f) - 1
+    if openpyxl is None:
+        return None
+    sheet = openpyxl.load_workbook(path, read_only=True).active
+    return sum(1 for _ in sheet.iter_rows()) - 1
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--students', type=int, default=4850)
+    parser.add_argument('--pdf', action='store_true', help="also render the fees report PDF")
+    args = parser.parse_args()
+
+    students, fees, rooms = make_hostel(args.students)
+    print(f"{len(students)} students, {len(fees)} fees\n")
+    exports = (
+        ('fees ledger', 'fees', 'fees-report', dict(fees_report_payload(students, fees, rooms), rows='fees'),
+         len(fees)),
+        ('fees breakdown', 'fees', 'fees-report', fees_report_payload(students, fees, rooms), len(students)),
+        ('students', 'students', 'all-students-report', all_students_payload(students, fees, rooms),
+         len(students)),
+    )
+
+    print(f"{'export':<16} {'format':<6} {'rows':>7} {'first byte ms':>14} {'total s':>8} {'MiB':>7} "
+          f"{'peak MiB':>9}")
+    mismatches = 0
+    with tempfile.TemporaryDirectory(prefix='navadaya-exports-') as directory:
+        for label, export, kind, payload, expected in exports:
+            for export_format in ('csv', 'xlsx'):
+                path = os.path.join(directory, f"{export}.{export_format}")
+                with open(path, 'wb') as output:
+                    first_byte, total, size, _ = stream(export, kind, payload, export_format, output)
+                # tracemalloc slows Python down several times; memory gets a run of its own
+                with open(os.devnull, 'wb') as output:
+                    peak = stream(export, kind, payload, export_format, output, trace=True)[3]
+                rows = data_rows(path, export_format)
+                if rows is not None and rows != expected:
+                    print(f"  MISMATCH: {label} {export_format} has {rows} rows, expected {expected}")
+                    mismatches += 1
+                print(f"{label:<16} {export_format:<6} {expected:>7} {first_byte * 1000:>14.1f} {total:>8.2f} "
+                      f"{size / 1024 / 1024:>7.2f} {peak / 1024 / 1024:>9.2f}")
+
+    if args.pdf:
+        from renderers import render_fees_report
+        started = time.perf_counter()
+        pdf, _ = render_fees_report(fees_report_payload(students, fees, rooms))
+        print(f"\nfees report PDF: {time.perf_counter() - started:.2f} s, {pdf.size / 1024 / 1024:.2f} MiB")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fee totals for the fees report at 10k and 100k fee rows
+
+Compares the old pattern from generate_fees_report (four sum() scans for
+the overall summary, then four more per student over the grouped fees)
+with fee_aggregation's single pass and its optional NumPy path. The last
+column groups by all five fields (studentId, status, feeType, year,
+month) and rolls up per fee type, which the legacy code could not do.
+
+Usage: python benchmarks/bench_fee_aggregation.py [rows ...]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fee_aggregation import FEE_GROUP_FIELDS, aggregate_fees, np
+
+FEE_TYPES = ('monthly_rent', 'security_deposit', 'maintenance', 'electricity', 'other')
+STATUSES = ('paid', 'paid', 'paid', 'pending', 'overdue')
+
+def make_fees(rows, students):
+    rng = random.Random(rows)
+    return [{
+        'studentId': f"student-{rng.randrange(students)}",
+        'amount': rng.choice((4500, 5000, 5500, 750.5, 1200)),
+        'status': rng.choice(STATUSES),
+        'feeType': rng.choice(FEE_TYPES),
+        'month': rng.randint(1, 12),
+        'year': rng.choice((2024, 2025)),
+    } for _ in range(rows)]
+
+def legacy_totals(fees, student_ids):
+    """The repeated sum() scans generate_fees_report used to run"""
+    overall = (
+        sum(fee.get('amount', 0) for fee in fees),
+        sum(fee.get('amount', 0) for fee in fees if fee.get('status') == 'paid'),
+        sum(fee.get('amount', 0) for fee in fees if fee.get('status') == 'pending'),
+        sum(fee.get('amount', 0) for fee in fees if fee.get('status') == 'overdue'),
+    )
+    student_fees = {}
+    for fee in fees:
+        student_fees.setdefault(fee.get('studentId'), []).append(fee)
+    per_student = {}
+    for student_id in student_ids:
+        rows = student_fees.get(student_id, [])
+        per_student[student_id] = (
+            sum(fee.get('amount', 0) for fee in rows),
+            sum(fee.get('amount', 0) for fee in rows if fee.get('status') == 'paid'),
+            sum(fee.get('amount', 0) for fee in rows if fee.get('status') == 'pending'),
+            sum(fee.get('amount', 0) for fee in rows if fee.get('status') == 'overdue'),
+        )
+    return overall, per_student
+
+def same_totals(totals, expected):
+    """Compare with the legacy sums, allowing for float summation order"""
+    actual = (totals.total, totals.paid, totals.pending, totals.overdue)
+    return all(abs(a - b) <= 1e-6 * max(1, abs(b)) for a, b in zip(actual, expected))
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'rows':>8}  {'legacy sum()':>13}  {'single pass':>12}  {'numpy':>10}  {'all 5 fields':>13}")
+    for rows in sizes:
+        students = max(1, rows // 24)
+        fees = make_fees(rows, students)
+        student_ids = [f"student-{i}" for i in range(students)]
+
+        legacy_time, (overall, per_student) = best_of(lambda: legacy_totals(fees, student_ids))
+        single_time, aggregate = best_of(lambda: aggregate_fees(fees).by_student)
+        aggregate = aggregate_fees(fees)
+        assert same_totals(aggregate.overall, overall)
+        for student_id in student_ids:
+            assert same_totals(aggregate.student(student_id), per_student[student_id])
+
+        numpy_column = 'n/a'
+        if np is not None:
+            numpy_time, _ = best_of(lambda: aggregate_fees(fees, vectorized=True).by_student)
+            assert same_totals(aggregate_fees(fees, vectorized=True).overall, overall)
+            numpy_column = f"{numpy_time * 1000:.1f} ms"
+
+        full_time, _ = best_of(lambda: aggregate_fees(fees, FEE_GROUP_FIELDS).rollup('feeType'))
+
+        print(f"{rows:>8}  {legacy_time * 1000:>10.1f} ms  {single_time * 1000:>9.1f} ms  {numpy_column:>10}"
+              f"  {full_time * 1000:>10.1f} ms")
+
+if __name__ == '__main__':
+    main()
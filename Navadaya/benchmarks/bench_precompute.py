@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Precomputed month-end reports: request time on demand vs prebuilt
+
+Loads a synthetic hostel into a scratch JSON dataset source and asks the
+report routes for one month's fees report and all-students report (the
+filters-plus-cursor requests js/reports.js sends once it has synced),
+first rendered on demand, then after ``precompute`` has built them into a
+scratch artifact store. Prints the precompute time per report and the
+request time and size of each response; prebuilt responses must be PDFs
+served with the artifact's ETag, else the run exits with status 1.
+
+Renders run inline and are never turned into jobs, so the on-demand time
+is the full render a request would otherwise wait for (or poll for as a
+report job).
+
+Usage: python benchmarks/bench_precompute.py [--students 1000] [--month 2025-12]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+SCRATCH = tempfile.mkdtemp(prefix='navadaya-precompute-')
+# Settings are read when main is imported, so pin them first
+os.environ.setdefault('RENDER_POOL_WORKERS', '0')
+os.environ.setdefault('REPORT_SYNC_MAX_STUDENTS', str(10**9))
+os.environ.setdefault('REPORT_CACHE_MAX_ENTRIES', '0')
+os.environ['DATASET_SOURCE'] = 'json'
+os.environ['DATASET_PATH'] = os.path.join(SCRATCH, 'dataset.json')
+os.environ['PRECOMPUTE_DIR'] = os.path.join(SCRATCH, 'artifacts')
+
+from main import app
+from precompute import get_artifact_store, precompute
+from synthetic_data import make_hostel
+
+ROUTES = (
+    ('fees-report', '/api/generate-fees-report'),
+    ('all-students-report', '/api/generate-all-students-report'),
+)
+
+def request_report(client, url, body):
+    started = time.perf_counter()
+    response = client.post(url, json=body)
+    data = response.get_data()
+    return time.perf_counter() - started, response, data
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--month', default='2025-12', help="YYYY-MM to request (synthetic fees cover 2025)")
+    args = parser.parse_args()
+
+    students, fees, rooms = make_hostel(args.students)
+    with open(os.environ['DATASET_PATH'], 'w') as f:
+        json.dump({'students': students, 'fees': fees, 'rooms': rooms}, f)
+    year, month = args.month.split('-')
+    filters = {'year': year, 'month': month}
+    print(f"{len(students)} students, {len(fees)} fees; filters {filters}\n")
+
+    client = app.test_client()
+    cursor = client.get('/api/dataset').get_json()
+    body = {'dataset': {'epoch': cursor['epoch'], 'version': cursor['version']}, 'filters': filters}
+
+    on_demand = {kind: request_report(client, url, body) for kind, url in ROUTES}
+    started = time.perf_counter()
+    built, failed = precompute(get_artifact_store(), filters=[filters])
+    precompute_seconds = time.perf_counter() - started
+    for error in failed:
+        print(f"  FAILED {error}")
+
+    print(f"{'report':<20} {'on demand s':>12} {'prebuilt ms':>12} {'304 ms':>8} {'KiB':>8} {'build s':>8}")
+    errors = len(failed)
+    builds = {manifest['kind']: manifest for manifest in built}
+    for kind, url in ROUTES:
+        render_seconds, rendered, _ = on_demand[kind]
+        seconds, response, data = request_report(client, url, body)
+        etag = response.headers.get('ETag')
+        not_modified = client.post(url, json=body, headers={'If-None-Match': etag or '""'})
+        cached_seconds = request_report(client, url, body)[0]
+        if rendered.status_code != 200 or response.status_code != 200 or not data.startswith(b'%PDF') \
+                or kind not in builds or etag != f'"{builds[kind]["keys"][0]}"' or not_modified.status_code != 304:
+            print(f"  UNEXPECTED: {kind} answered {rendered.status_code} / {response.status_code}, ETag {etag}")
+            errors += 1
+            continue
+        started = time.perf_counter()
+        client.post(url, json=body, headers={'If-None-Match': etag})
+        not_modified_seconds = time.perf_counter() - started
+        print(f"{kind:<20} {render_seconds:>12.2f} {min(seconds, cached_seconds) * 1000:>12.1f} "
+              f"{not_modified_seconds * 1000:>8.1f} {len(data) / 1024:>8.0f} {builds[kind]['seconds']:>8.2f}")
+    print(f"\nprecompute: {len(built)} reports in {precompute_seconds:.2f}s")
+    return errors
+
+def main():
+    try:
+        errors = run()
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+    if errors:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
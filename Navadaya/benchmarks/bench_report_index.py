@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark: fees-report student breakdown, linear scan vs hash index
+
+Times the student-wise breakdown rows of the fees report (room lookup plus
+fee totals per student) with the old per-student linear room scan and
+with report_index.PayloadIndex. Time per student should stay flat for the
+indexed version as the hostel grows; the linear scan grows with the room
+count and is skipped beyond --legacy-max students.
+
+Usage: python benchmarks/bench_report_index.py [--legacy-max N] [students ...]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fee_aggregation import aggregate_fees
+from report_index import PayloadIndex, student_fee_breakdown
+
+def make_payload(students):
+    rng = random.Random(students)
+    rooms = [{'id': f"room-{i}", 'roomNumber': str(100 + i)} for i in range(max(1, students // 2))]
+    student_rows = [{
+        'id': f"student-{i}",
+        'firstName': f"Student{i}",
+        'lastName': 'Test',
+        'assignedRoom': f"room-{rng.randrange(len(rooms))}",
+    } for i in range(students)]
+    fees = [{
+        'studentId': f"student-{rng.randrange(students)}",
+        'amount': 5000,
+        'status': rng.choice(('paid', 'pending', 'overdue')),
+    } for _ in range(students * 6)]
+    return student_rows, fees, rooms
+
+def legacy_breakdown(students, fees, rooms):
+    """The fees report's loop before indexing: a room scan per student"""
+    fee_totals = aggregate_fees(fees)
+    rows = []
+    for student in students:
+        room_number = 'N/A'
+        if student.get('assignedRoom'):
+            room = next((r for r in rooms if r.get('id') == student.get('assignedRoom')), None)
+            if room:
+                room_number = room.get('roomNumber', 'N/A')
+        rows.append((student, room_number, fee_totals.student(student.get('id'))))
+    return rows
+
+def indexed_breakdown(students, fees, rooms):
+    return list(student_fee_breakdown(PayloadIndex(students, fees, rooms)))
+
+def timed(func, *args, repeat=3):
+    """Best of ``repeat`` runs, with cyclic GC kept out of the numbers like timeit"""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            result = func(*args)
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('students', nargs='*', type=int,
+                        default=[1_000, 2_500, 5_000, 10_000, 20_000, 40_000])
+    parser.add_argument('--legacy-max', type=int, default=5_000)
+    args = parser.parse_args()
+
+    print(f"{'students':>9} {'rooms':>7}  {'linear scan':>12} {'us/student':>11}  {'indexed':>9} {'us/student':>11}")
+    for count in args.students:
+        students, fees, rooms = make_payload(count)
+        indexed_time, indexed_rows = timed(indexed_breakdown, students, fees, rooms)
+        legacy_columns = f"{'skipped':>12} {'':>11}"
+        if count <= args.legacy_max:
+            legacy_time, legacy_rows = timed(legacy_breakdown, students, fees, rooms)
+            assert [row[1] for row in legacy_rows] == [row[1] for row in indexed_rows]
+            legacy_columns = f"{legacy_time * 1000:>9.1f} ms {legacy_time / count * 1e6:>11.1f}"
+        print(f"{count:>9} {len(rooms):>7}  {legacy_columns}  {indexed_time * 1000:>6.1f} ms "
+              f"{indexed_time / count * 1e6:>11.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Request body decode: parse time and peak memory for a large fees payload
+
+Builds the /api/generate-fees-report body for a synthetic hostel (~20 MB
+of JSON at the default 4200 students) and decodes it inside a Flask
+request context the way the app did before (``request.get_json()``, the
+standard library decoder over the cached body) and the way
+``decode_json_body`` does now (``request_body.read_body`` +
+``decode_json``), for each installed JSON decoder and each upload
+encoding. Prints the bytes on the wire, the best-of-N decode time, and
+the tracemalloc peak during one decode and what stays allocated after it
+for the rest of the request. Every variant must decode to the same
+payload; any mismatch exits with status 1.
+
+Usage: python benchmarks/bench_request_body.py [--students 4200] [--repeat 5]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import tracemalloc
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask, request
+
+from request_body import JSON_DECODERS, read_body, decode_json, zstandard
+from synthetic_data import make_hostel, fees_report_payload
+
+app = Flask(__name__)
+
+ENCODERS = {
+    'identity': lambda body: body,
+    'gzip': lambda body: gzip.compress(body, 6),
+    'deflate': lambda body: zlib.compress(body, 6),
+}
+if zstandard is not None:
+    ENCODERS['zstd'] = lambda body: zstandard.ZstdCompressor(level=3).compress(body)
+
+def stdlib_get_json():
+    return request.get_json()
+
+def middleware(decoder):
+    def decode():
+        body = read_body(request.stream, request.headers.get('Content-Encoding'), None, request.content_length)
+        return decode_json(body, decoder)
+    return decode
+
+def in_request(wire, encoding, decode, trace=False):
+    """``(result, seconds, peak bytes, retained bytes)`` of one decode; only the decode itself is measured"""
+    headers = {} if encoding == 'identity' else {'Content-Encoding': encoding}
+    with app.test_request_context('/api/generate-fees-report', method='POST', data=wire, headers=headers,
+                                  content_type='application/json'):
+        if trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        result = decode()
+        elapsed = time.perf_counter() - started
+        retained = peak = 0
+        if trace:
+            # retained: the decoded payload plus whatever the request still holds on to (its cached body)
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return result, elapsed, peak, retained
+
+def measure(wire, encoding, decode, repeat):
+    best = min(in_request(wire, encoding, decode)[1] for _ in range(repeat))
+    result, _, peak, retained = in_request(wire, encoding, decode, trace=True)
+    return result, best, peak, retained
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--students', type=int, default=4200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    students, fees, rooms = make_hostel(args.students)
+    payload = fees_report_payload(students, fees, rooms)
+    body = json.dumps(payload).encode()
+    print(f"{args.students} students, {len(fees)} fees: {len(body) / 1024 / 1024:.1f} MiB of JSON\n")
+
+    variants = [('before', 'identity', 'request.get_json', stdlib_get_json)]
+    for encoding in ENCODERS:
+        for decoder in JSON_DECODERS:
+            variants.append(('after', encoding, decoder, middleware(decoder)))
+
+    print(f"{'':<7} {'encoding':<9} {'decoder':<17} {'wire MiB':>9} {'decode ms':>10} {'peak MiB':>9} "
+          f"{'held MiB':>9}")
+    mismatches = 0
+    baseline = None
+    for label, encoding, decoder, decode in variants:
+        wire = ENCODERS[encoding](body)
+        result, seconds, peak, retained = measure(wire, encoding, decode, args.repeat)
+        if result != payload:
+            print(f"  MISMATCH: {encoding} / {decoder}")
+            mismatches += 1
+        baseline = baseline or (seconds, peak, retained)
+        print(f"{label:<7} {encoding:<9} {decoder:<17} {len(wire) / 1024 / 1024:>9.2f} {seconds * 1000:>10.1f} "
+              f"{peak / 1024 / 1024:>9.1f} {retained / 1024 / 1024:>9.1f}   "
+              f"{baseline[0] / seconds:.1f}x faster, peak {(peak - baseline[1]) / 1024 / 1024:+.0f} MiB, "
+              f"held {(retained - baseline[2]) / 1024 / 1024:+.0f} MiB")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
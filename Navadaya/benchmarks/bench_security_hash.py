@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Receipt security hash: golden values and single/batch timings
+
+Checks security_hash.security_hash and security_hashes against hashes
+printed on receipts by the original unbounded-int loop (GOLDEN), and
+against that loop itself on random strings (ASCII, Devanagari, emoji,
+NUL). Any mismatch exits with status 1, since it would break the
+verification of receipts already issued. Then times one hash per call and
+whole batches, pure Python and NumPy.
+
+Usage: python benchmarks/bench_security_hash.py [--random N] [batch sizes ...]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import security_hash
+from security_hash import security_string
+
+# (receipt fields, hash computed by the original loop)
+GOLDEN = [
+    ({'student_name': 'Asha Sharma', 'roll_number': 'NGH202500001', 'amount': 5000,
+      'fee_type': 'monthly_rent', 'timestamp': 1753869600.0}, 253305373155483),
+    ({'student_name': 'Priya Nair', 'roll_number': 'NGH202500042', 'amount': 1250.5,
+      'fee_type': 'electricity', 'timestamp': 1753869600.123456}, 227767650361267),
+    ({'student_name': 'Kavya Iyer', 'roll_number': 'NGH202400007', 'amount': 10000,
+      'fee_type': 'security_deposit', 'timestamp': 1735689600.0}, 169458709081248),
+    ({'student_name': 'प्रिया शर्मा', 'roll_number': 'NGH202500100', 'amount': 4500,
+      'fee_type': 'monthly_rent', 'timestamp': 1751328000.0}, 116525730465968),
+    ({'student_name': ' ', 'roll_number': '', 'amount': 0,
+      'fee_type': '', 'timestamp': 0.0}, 263586552101542),
+    ({'student_name': 'Zoë Müller 😀', 'roll_number': 'NGH202599999', 'amount': 750,
+      'fee_type': 'maintenance', 'timestamp': 1767225599.999}, 9463310468198),
+]
+
+def legacy_hash(text):
+    """generate_security_hash's original loop (unbounded ints, reduced at the end)"""
+    hash_value = 0
+    for char in text:
+        hash_value = ((hash_value << 5) - hash_value) + ord(char)
+        hash_value = hash_value & hash_value
+    return abs(hash_value) % (16**12)
+
+def random_texts(count, rng):
+    alphabets = [
+        lambda: chr(rng.randrange(32, 127)),
+        lambda: chr(rng.randrange(0x900, 0x980)),
+        lambda: chr(rng.randrange(0x1F600, 0x1F650)),
+        lambda: '\0',
+    ]
+    return [''.join(rng.choice(alphabets)() for _ in range(rng.randrange(0, 300))) for _ in range(count)]
+
+def check(random_count):
+    failures = 0
+    texts = [security_string(fields) for fields, _ in GOLDEN]
+    expected = [value for _, value in GOLDEN]
+    texts += random_texts(random_count, random.Random(2025))
+    expected += [legacy_hash(text) for text in texts[len(GOLDEN):]]
+
+    candidates = [('security_hash', [security_hash.security_hash(text) for text in texts]),
+                  ('security_hashes', security_hash.security_hashes(texts, vectorized=False))]
+    if security_hash.np is not None:
+        candidates.append(('security_hashes (NumPy)', security_hash.security_hashes(texts, vectorized=True)))
+    for name, got in candidates:
+        mismatches = [i for i, (a, b) in enumerate(zip(got, expected)) if a != b]
+        status = 'ok' if not mismatches else f"{len(mismatches)} MISMATCHES (first at #{mismatches[0]})"
+        print(f"  {name:<26} {len(texts)} strings: {status}")
+        failures += len(mismatches)
+    return failures
+
+def timed(func, *args, repeat=5):
+    """Best of ``repeat`` runs, with cyclic GC kept out of the numbers like timeit"""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            func(*args)
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('batches', nargs='*', type=int, default=[1, 100, 1_000, 10_000, 100_000])
+    parser.add_argument('--random', type=int, default=2_000, help="random strings to check against the legacy loop")
+    args = parser.parse_args()
+
+    print("Compatibility:")
+    if check(args.random):
+        sys.exit(1)
+
+    base = dict(GOLDEN[0][0])
+    print(f"\n{'receipts':>9}  {'legacy loop':>12}  {'security_hash':>14}  {'NumPy batch':>12}   (us/receipt)")
+    for count in args.batches:
+        texts = [security_string(dict(base, roll_number=f"NGH2025{i:05d}", timestamp=1753869600.0 + i))
+                 for i in range(count)]
+        legacy = timed(lambda: [legacy_hash(text) for text in texts])
+        python = timed(security_hash.security_hashes, texts, False)
+        numpy = f"{timed(security_hash.security_hashes, texts, True) / count * 1e6:>12.2f}" \
+            if security_hash.np is not None else f"{'n/a':>12}"
+        print(f"{count:>9}  {legacy / count * 1e6:>12.2f}  {python / count * 1e6:>14.2f}  {numpy}")
+
+if __name__ == '__main__':
+    main()
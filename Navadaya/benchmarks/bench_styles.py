@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-request receipt style construction vs the shared registry
+
+Compares what generate_fee_receipt used to do on every request (a fresh
+getSampleStyleSheet(), nine ParagraphStyles and six TableStyles) with the
+lookups into pdf_styles. Reports mean latency and allocated bytes/blocks
+per request.
+
+Usage: python benchmarks/bench_styles.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.platypus import TableStyle
+
+from pdf_styles import PARAGRAPH_STYLES, TABLE_STYLES
+
+def per_request_styles():
+    """The receipt route's style setup before the registry existed"""
+    styles = getSampleStyleSheet()
+    built = [
+        ParagraphStyle('ReceiptTitle', parent=styles['Heading1'], fontSize=20, spaceAfter=20, alignment=TA_CENTER, textColor=colors.darkblue),
+        ParagraphStyle('ReceiptHeader', parent=styles['Heading2'], fontSize=14, spaceAfter=12, textColor=colors.darkgreen),
+        ParagraphStyle('ReceiptNormal', parent=styles['Normal'], fontSize=11, spaceAfter=8),
+        ParagraphStyle('RightAlign', parent=styles['Normal'], fontSize=11, alignment=TA_RIGHT),
+        ParagraphStyle('QRDesc', parent=styles['Normal'], fontSize=9, spaceAfter=6),
+        ParagraphStyle('QRError', parent=styles['Normal'], fontSize=9, alignment=TA_CENTER, textColor=colors.grey),
+        ParagraphStyle('SecurityWarning', parent=styles['Normal'], fontSize=9, alignment=TA_CENTER, textColor=colors.red, spaceAfter=15),
+        ParagraphStyle('Footer', parent=styles['Normal'], fontSize=9, alignment=TA_CENTER, textColor=colors.grey, spaceAfter=10),
+        ParagraphStyle('Generated', parent=styles['Normal'], fontSize=8, alignment=TA_CENTER, textColor=colors.grey),
+    ]
+    for commands in TABLE_STYLES['receipt'].values():
+        built.append(TableStyle(list(commands.getCommands())))
+    return built
+
+def registry_styles():
+    """The receipt route's style setup with the shared registry"""
+    styles = PARAGRAPH_STYLES['receipt']
+    tables = TABLE_STYLES['receipt']
+    return [styles['title'], styles['header'], styles['normal'], styles['qr_description'],
+            styles['security_warning'], styles['footer'], styles['generated'],
+            tables['header'], tables['student'], tables['fee'], tables['amount'],
+            tables['security'], tables['qr']]
+
+def measure(func, iterations):
+    seconds = min(timeit.repeat(func, number=iterations, repeat=5)) / iterations
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [func() for _ in range(100)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    size = sum(stat.size_diff for stat in stats) / len(kept)
+    blocks = sum(stat.count_diff for stat in stats) / len(kept)
+    return seconds, size, blocks
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{'variant':<14}{'latency/req':>14}{'bytes/req':>12}{'blocks/req':>12}")
+    results = {}
+    for name, func in (('per-request', per_request_styles), ('registry', registry_styles)):
+        results[name] = measure(func, iterations)
+        seconds, size, blocks = results[name]
+        print(f"{name:<14}{seconds * 1e6:>11.1f} us{size:>12.0f}{blocks:>12.0f}")
+    speedup = results['per-request'][0] / results['registry'][0]
+    print(f"registry is {speedup:.0f}x faster per receipt style setup")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Load test for server.py: hundreds of concurrent keep-alive connections
+
+Starts server.py on a free port over a temporary copy of the site plus a
+large file, parks one client on a download of that file without reading
+it (a slow client), then opens --connections connections at once. Each
+sends --requests requests over its keep-alive connection, a mix of whole
+pages and byte ranges, and checks status, length and content. Prints
+throughput and latency percentiles; exits with status 1 if any request
+failed or took longer than --max-latency (the slow client held everyone
+else up, as it did with the single-threaded server: try --workers 1).
+The clients run on the same machine as the server, so on few cores the
+latency tail mostly measures CPU contention between the two.
+
+Usage: python benchmarks/load_test_server.py [--connections 300] [--requests 20] [--workers 128]
+"""
+
+import argparse
+import http.client
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(HERE, '..')
+SITE_FILES = ('index.html', 'fees.html', 'student-portal.html', 'css/styles.css', 'js/fees.js', 'js/utils.js',
+              'test_receipt.pdf')
+LARGE_FILE = 'large.bin'
+LARGE_FILE_SIZE = 64 * 1024 * 1024
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def make_site(directory):
+    files = {}
+    for name in SITE_FILES:
+        target = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy(os.path.join(APP_DIR, name), target)
+        with open(target, 'rb') as f:
+            files[name] = f.read()
+    with open(os.path.join(directory, LARGE_FILE), 'wb') as f:
+        f.write(os.urandom(1024 * 1024) * (LARGE_FILE_SIZE // (1024 * 1024)))
+    return files
+
+def wait_for(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("server.py did not start")
+
+def start_slow_client(port):
+    """Request the large file and never read it, so a worker stays stuck sending"""
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.sendall(f"GET /{LARGE_FILE} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    return sock
+
+def client(port, files, requests, barrier, latencies, errors, seed):
+    rng = random.Random(seed)
+    names = list(files)
+    try:
+        barrier.wait()
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        for _ in range(requests):
+            name = rng.choice(names)
+            body = files[name]
+            headers = {}
+            expected = body
+            if rng.random() < 0.3:
+                start = rng.randrange(len(body))
+                end = min(len(body) - 1, start + rng.randrange(1, 4096))
+                headers['Range'] = f"bytes={start}-{end}"
+                expected = body[start:end + 1]
+            started = time.perf_counter()
+            conn.request('GET', f"/{name}", headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+            latencies.append(time.perf_counter() - started)
+            wanted = 206 if 'Range' in headers else 200
+            if response.status != wanted or data != expected:
+                errors.append(f"{name} {headers}: {response.status}, {len(data)} bytes")
+        conn.close()
+    except Exception as e:
+        errors.append(f"{type(e).__name__}: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--connections', type=int, default=300)
+    parser.add_argument('--requests', type=int, default=20, help="requests per keep-alive connection")
+    parser.add_argument('--workers', type=int, default=128, help="server.py --workers")
+    parser.add_argument('--max-latency', type=float, default=10.0, help="slowest acceptable request (seconds)")
+    args = parser.parse_args()
+
+    site = tempfile.mkdtemp(prefix='navadaya-load-')
+    port = free_port()
+    server = None
+    try:
+        files = make_site(site)
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(APP_DIR, 'server.py'), '--port', str(port), '--bind', '127.0.0.1',
+             '--workers', str(args.workers), '--directory', site],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wait_for(port)
+        slow = start_slow_client(port)
+
+        latencies, errors = [], []
+        barrier = threading.Barrier(args.connections)
+        threads = [threading.Thread(target=client, args=(port, files, args.requests, barrier, latencies, errors, i))
+                   for i in range(args.connections)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        slow.close()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(site, ignore_errors=True)
+
+    total = args.connections * args.requests
+    print(f"{args.connections} concurrent keep-alive connections x {args.requests} requests "
+          f"({args.workers} workers, one stalled {LARGE_FILE_SIZE // 2**20} MB download)")
+    print(f"  completed  {len(latencies)}/{total} in {elapsed:.2f}s  ({len(latencies) / elapsed:.0f} req/s)")
+    if latencies:
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(f"  latency    p50 {quantiles[49] * 1000:.1f} ms, p95 {quantiles[94] * 1000:.1f} ms, "
+              f"p99 {quantiles[98] * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms")
+    if errors:
+        print(f"  {len(errors)} failures, e.g. {errors[0]}")
+        sys.exit(1)
+    if max(latencies) > args.max_latency:
+        print(f"  slowest request took {max(latencies):.1f}s (limit {args.max_latency:.0f}s)")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: PDF endpoints and QR/hash hot paths on synthetic hostels
+
+Times every /api/generate-* endpoint through the Flask test client on
+synthetic datasets (benchmarks/synthetic_data.py) at several hostel sizes,
+plus create_qr_code_image and generate_security_hash in isolation. Results
+are written as JSON so runs can be compared; with --baseline the run is
+checked against an earlier result file and exits with status 1 when any
+benchmark got slower than its regression threshold.
+
+Renders run inline (RENDER_POOL_WORKERS=0), bulk reports are never turned
+into jobs and the report cache is off, so each number is the cost of one
+full request on one core.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --scales 10 100 --baseline results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, HERE)
+
+# Settings are read when main is imported, so pin them first
+os.environ.setdefault('RENDER_POOL_WORKERS', '0')
+os.environ.setdefault('REPORT_SYNC_MAX_STUDENTS', str(10**9))
+os.environ.setdefault('REPORT_CACHE_MAX_ENTRIES', '0')
+
+import synthetic_data
+
+SCALES = (10, 100, 1_000, 10_000)
+
+# Allowed slowdown of the median before a benchmark counts as a regression
+DEFAULT_THRESHOLDS = {
+    'endpoint': 0.20,
+    'micro': 0.30,
+}
+# Differences below this many seconds are noise, whatever the ratio
+NOISE_FLOOR = 0.0005
+
+# name: (URL, payload builder, largest scale it runs at; None = every scale)
+ENDPOINTS = {
+    'student-report': ('/api/generate-student-report',
+                       lambda hostel, scale: synthetic_data.student_report_payload(*hostel), 10),
+    'all-students-report': ('/api/generate-all-students-report',
+                            lambda hostel, scale: synthetic_data.all_students_payload(*hostel), None),
+    'fees-report': ('/api/generate-fees-report',
+                    lambda hostel, scale: synthetic_data.fees_report_payload(*hostel), None),
+    'fee-receipt': ('/api/generate-fee-receipt',
+                    lambda hostel, scale: synthetic_data.receipt_payloads(*hostel, 1)[0], 10),
+    'fee-receipts-batch': ('/api/generate-fee-receipts/batch',
+                           lambda hostel, scale: {'receipts': synthetic_data.receipt_payloads(*hostel, scale)}, 100),
+}
+
+def measure(func, min_time, max_runs, min_runs=1):
+    """Call ``func`` until ``min_time`` seconds have passed (within the run limits)"""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_runs and (len(timings) < min_runs or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    return {
+        'median_s': statistics.median(timings),
+        'min_s': min(timings),
+        'max_s': max(timings),
+        'runs': len(timings),
+    }
+
+def bench_endpoints(client, scales, min_time, max_runs):
+    # Untimed first calls: lazy imports and ReportLab's font setup
+    small = synthetic_data.make_hostel(10)
+    for url, build_payload, _ in ENDPOINTS.values():
+        client.post(url, json=build_payload(small, 10))
+
+    results = {}
+    for scale in scales:
+        hostel = synthetic_data.make_hostel(scale)
+        for name, (url, build_payload, max_scale) in ENDPOINTS.items():
+            if max_scale is not None and scale > max_scale:
+                continue
+            payload = build_payload(hostel, scale)
+            size = {}
+
+            def request():
+                response = client.post(url, json=payload)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} answered {response.status_code}: {response.get_data(as_text=True)[:200]}")
+                size['bytes'] = len(response.get_data())
+
+            result = measure(request, min_time, max_runs)
+            result.update(kind='endpoint', scale=scale, response_bytes=size['bytes'])
+            results[f"{name}@{scale}"] = result
+            print_result(f"{name}@{scale}", result)
+    return results
+
+def bench_micro(min_time, max_runs):
+    """Per-call timings of the QR and security-hash helpers, averaged over a batch of calls per sample"""
+    from pdf_reports import create_qr_code_image, generate_qr_code_data, generate_security_hash, qr_code_matrix
+
+    students, fees, _ = synthetic_data.make_hostel(10)
+    student, fee = students[0], fees[0]
+    receipt_data = {
+        'student_name': f"{student['firstName']} {student['lastName']}",
+        'roll_number': student['rollNumber'],
+        'amount': fee['amount'],
+        'fee_type': fee['feeType'],
+        'timestamp': datetime(2025, 7, 30, 10, 0).timestamp(),
+    }
+    security_hash = generate_security_hash(receipt_data)
+    qr_data = generate_qr_code_data('RCP-ABCDEFGH', 'VC1234567890', security_hash,
+                                    student['rollNumber'], fee['amount'])
+
+    def qr_cold(batch):
+        for _ in range(batch):
+            qr_code_matrix.cache_clear()
+            create_qr_code_image(qr_data)
+
+    def qr_cached(batch):
+        for _ in range(batch):
+            create_qr_code_image(qr_data)
+
+    def security_hash(batch):
+        for _ in range(batch):
+            generate_security_hash(receipt_data)
+
+    results = {}
+    for name, func, batch in (('create_qr_code_image', qr_cold, 10),
+                              ('create_qr_code_image-cached', qr_cached, 1000),
+                              ('generate_security_hash', security_hash, 1000)):
+        result = measure(lambda: func(batch), min_time, max_runs, min_runs=3)
+        for key in ('median_s', 'min_s', 'max_s'):
+            result[key] /= batch
+        result.update(kind='micro', calls_per_run=batch)
+        results[name] = result
+        print_result(name, result)
+    return results
+
+def environment():
+    def version(package):
+        try:
+            return metadata.version(package)
+        except metadata.PackageNotFoundError:
+            return None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=HERE, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'reportlab': version('reportlab'),
+        'qrcode': version('qrcode'),
+        'flask': version('flask'),
+    }
+
+def print_result(name, result):
+    print(f"  {name:<36} {result['median_s'] * 1000:>10.3f} ms  (min {result['min_s'] * 1000:.3f}, "
+          f"{result['runs']} runs)", flush=True)
+
+def compare(results, baseline, threshold=None):
+    """Print the change against ``baseline`` and return the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<38} {'baseline':>12} {'now':>12} {'change':>8}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        limit = threshold if threshold is not None else DEFAULT_THRESHOLDS[result['kind']]
+        change = result['median_s'] / before['median_s'] - 1
+        regressed = change > limit and result['median_s'] - before['median_s'] > NOISE_FLOOR
+        marker = '  REGRESSION' if regressed else ''
+        print(f"{name:<38} {before['median_s'] * 1000:>9.3f} ms {result['median_s'] * 1000:>9.3f} ms "
+              f"{change:>+7.1%}{marker}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scales', nargs='+', type=int, default=list(SCALES),
+                        help="hostel sizes (students) to run the endpoints at")
+    parser.add_argument('--only', nargs='+', help="run only these benchmarks (names without @scale)")
+    parser.add_argument('--min-time', type=float, default=1.0,
+                        help="keep repeating a benchmark until this many seconds have passed")
+    parser.add_argument('--max-runs', type=int, default=20)
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--baseline', help="earlier results file to check for regressions")
+    parser.add_argument('--threshold', type=float,
+                        help="allowed slowdown for every benchmark (default: 0.20 endpoints, 0.30 micro)")
+    args = parser.parse_args()
+
+    if args.only:
+        for name in list(ENDPOINTS):
+            if name not in args.only:
+                del ENDPOINTS[name]
+
+    import main as app_module
+    client = app_module.app.test_client()
+
+    print("Endpoints:")
+    results = bench_endpoints(client, args.scales, args.min_time, args.max_runs)
+    if not args.only or any(name.startswith(('create_qr_code_image', 'generate_security_hash')) for name in args.only):
+        print("Hot paths (per call):")
+        results.update(bench_micro(args.min_time, args.max_runs))
+
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Synthetic hostel datasets for the benchmarks.
+
+``make_hostel(students)`` returns students, fees and rooms shaped like the
+Firestore documents js/reports.js posts (the fields pdf_reports reads:
+rollNumber, assignedRoom, feeType, status, paymentDate, ...). Generation is
+seeded by the size, so the same scale always yields the same data and
+benchmark runs stay comparable.
+
+The ``*_payload`` helpers build the request body of each /api/generate-*
+endpoint from a dataset, the same way the reports page does.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+FIRST_NAMES = ('Asha', 'Priya', 'Kavya', 'Sneha', 'Ananya', 'Divya', 'Meera', 'Pooja', 'Riya', 'Neha')
+LAST_NAMES = ('Sharma', 'Verma', 'Patel', 'Reddy', 'Nair', 'Iyer', 'Das', 'Singh', 'Gupta', 'Rao')
+COURSES = ('B.Sc', 'B.Com', 'B.A', 'B.Tech', 'BCA', 'M.Sc', 'MBA')
+ROOM_TYPES = ('single', 'double', 'triple', 'dormitory')
+FACILITIES = ('wifi', 'attached bathroom', 'study table', 'wardrobe', 'balcony')
+PAYMENT_METHODS = ('cash', 'upi', 'bank_transfer', 'card', 'cheque')
+# (status, weight): most fees are settled, a tail is pending or overdue
+STATUS_WEIGHTS = (('paid', 70), ('pending', 20), ('overdue', 10))
+
+def make_rooms(count, rng):
+    rooms = []
+    for i in range(count):
+        floor = i // 20 + 1
+        capacity = rng.choice((1, 2, 2, 3, 4))
+        rooms.append({
+            'id': f"room-{i:05d}",
+            'roomNumber': f"{floor}{i % 20 + 1:02d}",
+            'floor': floor,
+            'roomType': ROOM_TYPES[min(capacity, 4) - 1],
+            'capacity': capacity,
+            'occupiedBeds': 0,
+            'monthlyRent': rng.choice((4000, 4500, 5000, 5500, 6000)),
+            'facilities': ', '.join(rng.sample(FACILITIES, 3)),
+        })
+    return rooms
+
+def make_students(count, rooms, rng):
+    students = []
+    for i in range(count):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        student = {
+            'id': f"student-{i:06d}",
+            'firstName': first,
+            'lastName': last,
+            'rollNumber': f"NGH2025{i:05d}",
+            'course': rng.choice(COURSES),
+            'year': rng.randint(1, 4),
+            'email': f"{first.lower()}.{last.lower()}{i}@example.com",
+            'phone': f"9{rng.randrange(10**9):09d}",
+            'guardianName': f"{rng.choice(FIRST_NAMES)} {last}",
+            'guardianPhone': f"8{rng.randrange(10**9):09d}",
+            'address': f"{rng.randint(1, 999)} Main Road, Bengaluru",
+            'createdAt': (datetime(2025, 1, 1) + timedelta(days=rng.randrange(180))).isoformat(),
+        }
+        # About one student in ten is waiting for a room
+        if rooms and rng.random() < 0.9:
+            room = rooms[rng.randrange(len(rooms))]
+            room['occupiedBeds'] = min(room['capacity'], room['occupiedBeds'] + 1)
+            student['assignedRoom'] = room['id']
+        students.append(student)
+    return students
+
+def make_fees(students, rooms, rng, months=12):
+    rent = {room['id']: room['monthlyRent'] for room in rooms}
+    statuses = [status for status, _ in STATUS_WEIGHTS]
+    weights = [weight for _, weight in STATUS_WEIGHTS]
+    fees = []
+
+    def add_fee(student, fee_type, amount, month, year=2025):
+        status = rng.choices(statuses, weights)[0]
+        due = datetime(year, month, 5)
+        fee = {
+            'id': f"fee-{len(fees):07d}",
+            'studentId': student['id'],
+            'feeType': fee_type,
+            'amount': amount,
+            'status': status,
+            'month': month,
+            'year': year,
+            'dueDate': due.date().isoformat(),
+            'notes': '',
+        }
+        if status == 'paid':
+            fee['paymentDate'] = (due - timedelta(days=rng.randint(0, 4))).isoformat()
+            fee['paymentMethod'] = rng.choice(PAYMENT_METHODS)
+        fees.append(fee)
+
+    for student in students:
+        monthly = rent.get(student.get('assignedRoom'), 5000)
+        add_fee(student, 'security_deposit', monthly * 2, 1)
+        for month in range(1, months + 1):
+            add_fee(student, 'monthly_rent', monthly, month)
+            if month % 3 == 0:
+                add_fee(student, 'maintenance', 750, month)
+            if rng.random() < 0.3:
+                add_fee(student, 'electricity', round(rng.uniform(150, 900), 2), month)
+    return fees
+
+def make_hostel(students, seed=None):
+    """Return ``(students, fees, rooms)`` for a hostel of ``students`` students"""
+    rng = random.Random(students if seed is None else seed)
+    rooms = make_rooms(max(1, students // 2), rng)
+    student_rows = make_students(students, rooms, rng)
+    return student_rows, make_fees(student_rows, rooms, rng), rooms
+
+def _by_student(fees):
+    grouped = {}
+    for fee in fees:
+        grouped.setdefault(fee['studentId'], []).append(fee)
+    return grouped
+
+def student_report_payload(students, fees, rooms, index=0):
+    student = students[index]
+    rooms_by_id = {room['id']: room for room in rooms}
+    return {
+        'student': student,
+        'fees': _by_student(fees).get(student['id'], []),
+        'room': rooms_by_id.get(student.get('assignedRoom')),
+    }
+
+def all_students_payload(students, fees, rooms, filters=None):
+    rooms_by_id = {room['id']: room for room in rooms}
+    fees_by_student = _by_student(fees)
+    return {
+        'studentsData': [{
+            'student': student,
+            'fees': fees_by_student.get(student['id'], []),
+            'room': rooms_by_id.get(student.get('assignedRoom')),
+        } for student in students],
+        'filters': filters or {},
+        'reportType': 'all_students',
+    }
+
+def fees_report_payload(students, fees, rooms, filters=None):
+    return {'students': students, 'fees': fees, 'rooms': rooms, 'filters': filters or {}}
+
+def receipt_payloads(students, fees, rooms, count):
+    """Bodies for /api/generate-fee-receipt, one per paid fee, up to ``count``"""
+    students_by_id = {student['id']: student for student in students}
+    rooms_by_id = {room['id']: room for room in rooms}
+    receipts = []
+    for fee in fees:
+        if fee['status'] != 'paid':
+            continue
+        student = students_by_id[fee['studentId']]
+        receipts.append({
+            'student': student,
+            'fee': fee,
+            'room': rooms_by_id.get(student.get('assignedRoom')),
+        })
+        if len(receipts) == count:
+            break
+    return receipts
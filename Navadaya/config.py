@@ -1,5 +1,5 @@
 import os
-from flask import Flask
+import tempfile
 
 class Config:
     """Base configuration class"""
@@ -15,9 +15,116 @@ class Config:
     TESTING = False
     
     # File upload configuration
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB max upload (as sent, compressed or not)
     UPLOAD_FOLDER = 'uploads'
     
+    # API request bodies: largest decoded (decompressed) JSON body, and its decoder
+    # ('auto' takes orjson, then msgspec, when installed, else the standard library)
+    REQUEST_BODY_MAX_BYTES = int(os.environ.get('REQUEST_BODY_MAX_BYTES', 64 * 1024 * 1024))
+    JSON_DECODER = os.environ.get('JSON_DECODER', 'auto')
+    
+    # PDF render pool (0 workers renders inline on the request thread)
+    RENDER_POOL_WORKERS = int(os.environ.get('RENDER_POOL_WORKERS', max(2, (os.cpu_count() or 2) // 2)))
+    
+    # Encoded QR matrices kept per process, keyed by payload
+    QR_CACHE_SIZE = int(os.environ.get('QR_CACHE_SIZE', 1024))
+    
+    # Per-endpoint render lanes: (max waiting requests, timeout in seconds)
+    RENDER_LANES = {
+        'receipt': (32, 30),
+        'student-report': (16, 60),
+        'all-students-report': (4, 110),
+        'fees-report': (4, 110),
+        'all-students-job': (16, 900),
+        'fees-job': (16, 900),
+        'receipt-batch': (4, 110),
+    }
+    # Lanes that share a pool budget which always leaves one worker free
+    RENDER_HEAVY_LANES = ('all-students-report', 'fees-report', 'all-students-job', 'fees-job', 'receipt-batch')
+    RECEIPT_BATCH_MAX = int(os.environ.get('RECEIPT_BATCH_MAX', 2000))
+    # Append-only SQLite ledger of issued receipts behind /api/verify-receipt (keep it on persistent storage)
+    RECEIPT_LEDGER_PATH = os.environ.get('RECEIPT_LEDGER_PATH') or os.path.join(tempfile.gettempdir(), 'navadaya-receipts.sqlite3')
+    RECEIPT_VERIFY_MAX = int(os.environ.get('RECEIPT_VERIFY_MAX', 1000))
+
+    # Cross-worker admission control for PDF renders (per host, shared by all gunicorn workers).
+    # Groups: (budget of weight units in flight, max waiting requests, max seconds to wait before a 429);
+    # receipts and single-student reports get their own group so heavy reports never take their budget
+    ADMISSION_PATH = os.environ.get('ADMISSION_PATH') or os.path.join(tempfile.gettempdir(), 'navadaya-admission.sqlite3')
+    ADMISSION_GROUPS = {
+        'reports': (int(os.environ.get('ADMISSION_REPORT_BUDGET', max(1, os.cpu_count() or 1))), 4, 5),
+        'interactive': (int(os.environ.get('ADMISSION_INTERACTIVE_BUDGET', 8)), 16, 10),
+    }
+    # Render lane -> admission group (lanes not listed are not admission-controlled)
+    ADMISSION_ROUTES = {
+        'all-students-report': 'reports',
+        'fees-report': 'reports',
+        'receipt-batch': 'reports',
+        'all-students-job': 'reports',
+        'fees-job': 'reports',
+        'receipt': 'interactive',
+        'student-report': 'interactive',
+    }
+    # A render weighs one unit per this many students (or receipts) in its payload, at most its group's budget
+    ADMISSION_WEIGHT_UNIT = int(os.environ.get('ADMISSION_WEIGHT_UNIT', 100))
+    # Request threads of each gunicorn worker a group always leaves free (for receipts, /health and /ready)
+    ADMISSION_RESERVED_THREADS = {'reports': 3, 'interactive': 1}
+    # Leases older than this are taken to be leaked by a stuck worker and dropped
+    ADMISSION_LEASE_TTL = int(os.environ.get('ADMISSION_LEASE_TTL', 1800))
+
+    # Server-side students/fees/rooms snapshot that report requests can name instead of posting
+    # ('sqlite': synced by clients through /api/dataset/sync, 'json': a read-only file, or module:Class)
+    DATASET_SOURCE = os.environ.get('DATASET_SOURCE', 'sqlite')
+    DATASET_PATH = os.environ.get('DATASET_PATH') or os.path.join(tempfile.gettempdir(), 'navadaya-dataset.sqlite3')
+
+    # Rendered PDFs larger than this are spilled to a temp file and streamed from disk
+    PDF_SPOOL_THRESHOLD = int(os.environ.get('PDF_SPOOL_THRESHOLD', 1024 * 1024))
+    PDF_SPOOL_DIR = os.environ.get('PDF_SPOOL_DIR') or os.path.join(tempfile.gettempdir(), 'navadaya-pdf-spool')
+    PDF_STREAM_CHUNK_SIZE = int(os.environ.get('PDF_STREAM_CHUNK_SIZE', 64 * 1024))
+    # CSV/XLSX exports are encoded and sent this many bytes at a time
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 64 * 1024))
+
+    # Asynchronous report jobs
+    REPORT_JOB_DIR = os.environ.get('REPORT_JOB_DIR') or os.path.join(tempfile.gettempdir(), 'navadaya-report-jobs')
+    REPORT_JOB_TTL = int(os.environ.get('REPORT_JOB_TTL', 3600))  # seconds a finished PDF stays downloadable
+    REPORT_JOB_THREADS = int(os.environ.get('REPORT_JOB_THREADS', 4))
+    # Larger synchronous report requests are turned into jobs (202 + job id)
+    REPORT_SYNC_MAX_STUDENTS = int(os.environ.get('REPORT_SYNC_MAX_STUDENTS', 200))
+    # Students turned into flowables at a time while the all-students report is laid out
+    REPORT_SECTION_STUDENTS = int(os.environ.get('REPORT_SECTION_STUDENTS', 50))
+
+    # Rendered reports keyed by payload hash (0 entries or bytes disables the cache)
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'navadaya-report-cache')
+    REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL', 3600))
+    REPORT_CACHE_MAX_ENTRIES = int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', 256))
+    REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+    # Month-end fees and all-students reports prebuilt from the dataset snapshot (see precompute.py):
+    # months covered (the current one included), off-peak local hours for the in-process scheduler
+    # ('' turns it off, e.g. when cron runs `python precompute.py`), seconds between its checks, and retention
+    PRECOMPUTE_DIR = os.environ.get('PRECOMPUTE_DIR') or os.path.join(tempfile.gettempdir(), 'navadaya-precomputed')
+    PRECOMPUTE_MONTHS = int(os.environ.get('PRECOMPUTE_MONTHS', 2))
+    PRECOMPUTE_HOURS = os.environ.get('PRECOMPUTE_HOURS', '1-5')
+    PRECOMPUTE_INTERVAL = int(os.environ.get('PRECOMPUTE_INTERVAL', 600))
+    PRECOMPUTE_RETENTION_DAYS = int(os.environ.get('PRECOMPUTE_RETENTION_DAYS', 90))
+    PRECOMPUTE_MAX_BYTES = int(os.environ.get('PRECOMPUTE_MAX_BYTES', 1024 * 1024 * 1024))
+    
+    # Prometheus multiprocess directory shared by gunicorn and render pool processes
+    METRICS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR') or os.path.join(tempfile.gettempdir(), 'navadaya-metrics')
+    
+    # Opt-in cProfile capture of report requests (no admin token and a 0 sample rate keep it off)
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'navadaya-profiles')
+    PROFILE_ADMIN_TOKEN = os.environ.get('PROFILE_ADMIN_TOKEN')
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_MAX = int(os.environ.get('PROFILE_MAX', 50))
+    
+    # Static assets: compressed variants cached by content hash; fingerprinted URLs are cached this long
+    STATIC_ROOT = os.path.dirname(os.path.abspath(__file__))
+    STATIC_CACHE_DIR = os.environ.get('STATIC_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'navadaya-static')
+    STATIC_IMMUTABLE_MAX_AGE = int(os.environ.get('STATIC_IMMUTABLE_MAX_AGE', 365 * 24 * 3600))
+    
+    # Workers mark themselves warmed up here; /ready waits for all of them
+    WARMUP_STATE_DIR = os.environ.get('WARMUP_STATE_DIR') or os.path.join(tempfile.gettempdir(), 'navadaya-warmup')
+    
     # Security headers
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
@@ -35,6 +142,9 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
+    RENDER_POOL_WORKERS = 0
+    REPORT_CACHE_MAX_ENTRIES = 0
+    PRECOMPUTE_HOURS = ''
     SESSION_COOKIE_SECURE = False
 
 # Configuration mapping
@@ -45,14 +155,15 @@ config = {
     'default': DevelopmentConfig
 }
 
-def create_app(config_name=None):
-    """Application factory pattern"""
+def get_config(config_name=None):
+    """Return the configuration class selected by FLASK_ENV"""
     if config_name is None:
         config_name = os.environ.get('FLASK_ENV', 'default')
-    
-    app = Flask(__name__, static_folder='.', static_url_path='')
-    app.config.from_object(config[config_name])
-    
+    return config.get(config_name, config['default'])
+
+def create_app(config_name=None):
+    """Application factory pattern"""
     # Import and register routes
-    from main import app as main_app
-    return main_app
\ No newline at end of file
+    from main import app
+    app.config.from_object(get_config(config_name))
+    return app
\ No newline at end of file
@@ -0,0 +1,358 @@
+"""
+Server-side snapshot of the students, fees and rooms collections.
+
+The reports page used to POST every student, fee and room on each report,
+so request bodies grew with the fee history. Instead, clients keep the
+server's copy in sync by uploading only the documents that changed since
+their last sync (``POST /api/dataset/sync``), and report requests name a
+snapshot version plus their filters (``{"dataset": {...}, "filters":
+{...}}``); the server builds the same payload the page would have posted.
+
+Documents come from a ``DatasetSource``:
+
+* ``sqlite`` (default): a versioned document store in ``DATASET_PATH``
+  that the sync API writes to. Every change gets the next version number
+  and deletes are kept as tombstones, so readers fetch just the documents
+  changed since the version they hold. A full (``reset``) sync replaces
+  the store and starts a new epoch, which invalidates every cursor.
+* ``json``: a read-only ``{"students": [...], "fees": [...], "rooms":
+  [...]}`` file (the fees report payload has this shape), standing in for
+  Firestore in benchmarks and tests; editing the file starts a new epoch.
+* ``package.module:Class``: any other source (e.g. one reading Firestore
+  directly) constructed with ``DATASET_PATH``.
+
+Each process keeps an indexed, in-memory ``DatasetSnapshot`` and brings it
+up to date from the source before answering; when nothing changed that is
+one indexed SQLite read.
+"""
+
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+from config import get_config
+
+COLLECTIONS = ('students', 'fees', 'rooms')
+
+class DatasetError(ValueError):
+    """A sync or report request the dataset cannot serve (answered with 400)"""
+
+class StaleCursor(DatasetError):
+    """The client's cursor names another epoch or a version this server never had (409)"""
+
+class Delta:
+    """Changes between two versions of a source; ``reset`` means replace everything"""
+
+    __slots__ = ('epoch', 'version', 'reset', 'upserts', 'deletes')
+
+    def __init__(self, epoch, version, reset=False, upserts=None, deletes=None):
+        self.epoch = epoch
+        self.version = version
+        self.reset = reset
+        self.upserts = upserts or {}
+        self.deletes = deletes or {}
+
+class DatasetSource:
+    """Where the snapshot's documents come from"""
+
+    writable = False
+
+    def changes(self, epoch, since):
+        """``Delta`` from ``(epoch, since)`` to the current version (a reset if the epoch differs)"""
+        raise NotImplementedError
+
+    def apply(self, upserts, deletes, epoch=None, reset=False):
+        """Store changed documents; returns ``(epoch, version, documents changed)``"""
+        raise DatasetError(f"The {type(self).__name__} dataset source is read-only")
+
+class SQLiteSource(DatasetSource):
+    """Versioned document store written by the sync API"""
+
+    writable = True
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS documents (
+        collection TEXT NOT NULL,
+        id TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        body TEXT,  -- NULL marks a deleted document, kept so deltas carry the delete
+        PRIMARY KEY (collection, id)
+    );
+    CREATE INDEX IF NOT EXISTS documents_by_version ON documents (version);
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    """
+
+    def __init__(self, path, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self.connection
+        conn.executescript(self.SCHEMA)
+        conn.execute("INSERT OR IGNORE INTO meta VALUES ('epoch', ?), ('version', '0')", (uuid.uuid4().hex,))
+
+    @property
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit; transactions are opened explicitly so reads see one consistent version
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _meta(self, conn):
+        meta = dict(conn.execute('SELECT key, value FROM meta').fetchall())
+        return meta['epoch'], int(meta['version'])
+
+    def changes(self, epoch, since):
+        conn = self.connection
+        conn.execute('BEGIN')
+        try:
+            current_epoch, version = self._meta(conn)
+            if epoch != current_epoch:
+                rows = conn.execute('SELECT collection, id, body FROM documents WHERE body IS NOT NULL').fetchall()
+            elif since < version:
+                rows = conn.execute('SELECT collection, id, body FROM documents WHERE version > ?', (since,)).fetchall()
+            else:
+                rows = []
+        finally:
+            conn.execute('COMMIT')
+        delta = Delta(current_epoch, version, reset=epoch != current_epoch)
+        for collection, doc_id, body in rows:
+            if body is None:
+                delta.deletes.setdefault(collection, []).append(doc_id)
+            else:
+                delta.upserts.setdefault(collection, []).append(json.loads(body))
+        return delta
+
+    def apply(self, upserts, deletes, epoch=None, reset=False):
+        conn = self.connection
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            current_epoch, version = self._meta(conn)
+            if reset:
+                current_epoch = uuid.uuid4().hex
+                conn.execute('DELETE FROM documents')
+            elif epoch is not None and epoch != current_epoch:
+                raise StaleCursor("The dataset was reset since this client last synced; send a full sync")
+            changed = 0
+            for collection, docs in upserts.items():
+                changed += conn.executemany(
+                    'INSERT INTO documents (collection, id, version, body) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (collection, id) DO UPDATE SET version = excluded.version, body = excluded.body '
+                    'WHERE body IS NOT excluded.body',
+                    [(collection, doc['id'], version + 1, _canonical(doc)) for doc in docs]).rowcount
+            for collection, ids in deletes.items():
+                changed += conn.executemany(
+                    'UPDATE documents SET version = ?, body = NULL WHERE collection = ? AND id = ? AND body IS NOT NULL',
+                    [(version + 1, collection, doc_id) for doc_id in ids]).rowcount
+            # Unchanged documents do not move the version, so client cursors stay valid
+            if changed or reset:
+                version += 1
+                conn.executemany('UPDATE meta SET value = ? WHERE key = ?',
+                                 [(current_epoch, 'epoch'), (str(version), 'version')])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return current_epoch, version, changed
+
+class JSONSource(DatasetSource):
+    """Read-only dataset file; each modification of the file is a new epoch"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def changes(self, epoch, since):
+        stat = os.stat(self.path)
+        current_epoch = f"json-{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        if epoch == current_epoch:
+            return Delta(current_epoch, 1)
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        return Delta(current_epoch, 1, reset=True, upserts={name: data.get(name, []) for name in COLLECTIONS})
+
+def _canonical(doc):
+    return json.dumps(doc, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+def loose_equal(value, wanted):
+    """JavaScript's ``value == wanted`` for the JSON scalars report filters compare"""
+    if isinstance(value, str) and isinstance(wanted, (int, float)):
+        value, wanted = wanted, value
+    if isinstance(value, (int, float)) and isinstance(wanted, str):
+        try:
+            return value == float(wanted.strip() or 0)
+        except ValueError:
+            return False
+    return value == wanted
+
+def _check_changes(upserts, deletes):
+    for changes, kind in ((upserts, 'upserts'), (deletes, 'deletes')):
+        if not isinstance(changes, dict):
+            raise DatasetError(f"{kind} must map collection names to lists")
+        for collection, items in changes.items():
+            if collection not in COLLECTIONS:
+                raise DatasetError(f"Unknown collection {collection!r} (expected one of {', '.join(COLLECTIONS)})")
+            if not isinstance(items, list):
+                raise DatasetError(f"{kind}.{collection} must be a list")
+    for collection, docs in upserts.items():
+        if not all(isinstance(doc, dict) and isinstance(doc.get('id'), str) and doc['id'] for doc in docs):
+            raise DatasetError(f"Every document in upserts.{collection} needs a string id")
+    for collection, ids in deletes.items():
+        if not all(isinstance(doc_id, str) for doc_id in ids):
+            raise DatasetError(f"deletes.{collection} must list document ids")
+
+def _cursor(cursor):
+    if not isinstance(cursor, dict) or not isinstance(cursor.get('epoch'), str) \
+            or not isinstance(cursor.get('version'), int):
+        raise DatasetError('dataset must be {"epoch": "...", "version": N} as returned by /api/dataset/sync')
+    return cursor['epoch'], cursor['version']
+
+class DatasetSnapshot:
+    """Indexed, in-memory copy of a source, brought up to date by deltas"""
+
+    def __init__(self, source):
+        self.source = source
+        self.epoch = None
+        self.version = 0
+        self._docs = {name: {} for name in COLLECTIONS}
+        self._ordered = {}
+        self._fees_by_student = None
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        """Apply the source's changes since this snapshot's version; returns ``(epoch, version)``"""
+        with self._lock:
+            delta = self.source.changes(self.epoch, self.version)
+            if delta.reset:
+                self._docs = {name: {} for name in COLLECTIONS}
+            for name, docs in delta.upserts.items():
+                collection = self._docs[name]
+                for doc in docs:
+                    collection[doc['id']] = doc
+            for name, ids in delta.deletes.items():
+                collection = self._docs[name]
+                for doc_id in ids:
+                    collection.pop(doc_id, None)
+            if delta.reset or delta.upserts or delta.deletes:
+                self._ordered = {}
+                self._fees_by_student = None
+            self.epoch, self.version = delta.epoch, delta.version
+            return self.epoch, self.version
+
+    def status(self):
+        with self._lock:
+            return {
+                'epoch': self.epoch,
+                'version': self.version,
+                'writable': self.source.writable,
+                'counts': {name: len(docs) for name, docs in self._docs.items()},
+            }
+
+    def sync(self, upserts=None, deletes=None, cursor=None, reset=False):
+        """Store a client's changes; ``cursor`` is the ``{epoch, version}`` its changes are relative to"""
+        upserts = upserts or {}
+        deletes = deletes or {}
+        _check_changes(upserts, deletes)
+        epoch = None if reset or cursor is None else _cursor(cursor)[0]
+        _, _, changed = self.source.apply(upserts, deletes, epoch=epoch, reset=reset)
+        self.refresh()
+        return dict(self.status(), changed=changed)
+
+    def _ordered_docs(self, name):
+        """Documents ordered by id, the order Firestore returns them to the page"""
+        ordered = self._ordered.get(name)
+        if ordered is None:
+            docs = self._docs[name]
+            ordered = self._ordered[name] = [docs[doc_id] for doc_id in sorted(docs)]
+        return ordered
+
+    def _fees_for(self):
+        if self._fees_by_student is None:
+            fees_by_student = {}
+            for fee in self._ordered_docs('fees'):
+                fees_by_student.setdefault(fee.get('studentId'), []).append(fee)
+            self._fees_by_student = fees_by_student
+        return self._fees_by_student
+
+    def report_payload(self, kind, filters, cursor):
+        """Build ``kind``'s request payload as js/reports.js would, at least as new as ``cursor``
+
+        Returns ``(payload, {epoch, version})`` naming the snapshot it was built from.
+        """
+        epoch, version = _cursor(cursor)
+        if not isinstance(filters, dict):
+            raise DatasetError('filters must be an object')
+        builders = {'all-students-report': self._all_students_payload, 'fees-report': self._fees_payload}
+        if kind not in builders:
+            raise DatasetError(f"{kind} cannot be built from the dataset snapshot")
+        with self._lock:
+            self.refresh()
+            if epoch != self.epoch or version > self.version:
+                raise StaleCursor("This server does not hold the dataset version the client synced; sync again")
+            return builders[kind](filters), {'epoch': self.epoch, 'version': self.version}
+
+    def _all_students_payload(self, filters):
+        fees_by_student = self._fees_for()
+        rooms = self._docs['rooms']
+        students_data = []
+        for student in self._ordered_docs('students'):
+            fees = fees_by_student.get(student.get('id'), [])
+            if filters.get('year') and not any(loose_equal(fee.get('year'), filters['year']) for fee in fees):
+                continue
+            if filters.get('month') and not any(loose_equal(fee.get('month'), filters['month']) for fee in fees):
+                continue
+            assigned = student.get('assignedRoom')
+            students_data.append({'student': student, 'fees': fees, 'room': rooms.get(assigned) if assigned else None})
+        return {'studentsData': students_data, 'filters': filters, 'reportType': 'all_students'}
+
+    def _fees_payload(self, filters):
+        fees = self._ordered_docs('fees')
+        for field in ('year', 'month'):
+            if filters.get(field):
+                fees = [fee for fee in fees if loose_equal(fee.get(field), filters[field])]
+        for field in ('status', 'feeType'):
+            if filters.get(field):
+                fees = [fee for fee in fees if fee.get(field) == filters[field]]
+        students = self._ordered_docs('students')
+        if filters:
+            # Only students who have fees matching the filters
+            student_ids = {fee.get('studentId') for fee in fees}
+            students = [student for student in students if student.get('id') in student_ids]
+        return {'students': students, 'fees': fees, 'rooms': self._ordered_docs('rooms'), 'filters': filters}
+
+SOURCES = {
+    'sqlite': SQLiteSource,
+    'json': JSONSource,
+}
+
+def make_source(name, path):
+    """A source by ``SOURCES`` name, or any ``package.module:Class`` taking the path"""
+    if ':' in name:
+        module, _, attribute = name.partition(':')
+        factory = getattr(importlib.import_module(module), attribute)
+    elif name in SOURCES:
+        factory = SOURCES[name]
+    else:
+        raise ValueError(f"Unknown DATASET_SOURCE {name!r} (expected {', '.join(SOURCES)} or module:Class)")
+    return factory(path)
+
+_dataset = None
+_dataset_pid = None
+_dataset_lock = threading.Lock()
+
+def get_dataset():
+    """Return this process's snapshot, reopening its source after any fork"""
+    global _dataset, _dataset_pid
+    with _dataset_lock:
+        if _dataset is None or _dataset_pid != os.getpid():
+            settings = get_config()
+            _dataset = DatasetSnapshot(make_source(settings.DATASET_SOURCE, settings.DATASET_PATH))
+            _dataset_pid = os.getpid()
+        return _dataset
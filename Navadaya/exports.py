@@ -0,0 +1,266 @@
+"""
+Streaming CSV and XLSX exports of the fee and student reports.
+
+Accounts reconcile against the numbers in the reports, not the typeset
+PDF, so ``/api/export/fees`` and ``/api/export/students`` return them as
+spreadsheets. They take the same payloads as the PDF routes (or a dataset
+cursor and filters, see dataset.py) and total fees with the same
+``PayloadIndex``/``aggregate_fees`` code, so an export always agrees with
+the PDF for the same request.
+
+Rows come from generators and are encoded and handed to the client in
+``EXPORT_CHUNK_SIZE`` chunks. The first chunk (the CSV header row, or the
+XLSX workbook parts) goes out before any row is computed, so the download
+starts at once, and the output is never held in memory whole. XLSX is written
+without a spreadsheet library: the workbook parts are tiny and the sheet
+is streamed row by row (inline strings, no shared-string table) into a
+ZIP whose entries are deflated as they are written, the same way the
+receipt batches stream their ZIP.
+
+Exports:
+
+* ``fees`` with ``rows: 'students'`` (default): the student-wise breakdown
+  of the fees report.
+* ``fees`` with ``rows: 'fees'``: the fee ledger, one row per fee.
+* ``students``: one row per student of the all-students report with their
+  fee totals.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from fee_aggregation import aggregate_fees
+from receipt_batches import ChunkBuffer
+from report_index import PayloadIndex, student_fee_breakdown
+
+class ExportError(ValueError):
+    """An export request that cannot be served (unknown rows or format)"""
+
+# Cell kinds: text, money (two decimals) and plain numbers
+TEXT, AMOUNT, NUMBER = 'text', 'amount', 'number'
+
+def _name(student):
+    return f"{student.get('firstName', '')} {student.get('lastName', '')}".strip()
+
+def _amount(value):
+    return round(value, 2)
+
+def _totals_cells(totals):
+    return [_amount(totals.total), _amount(totals.paid), _amount(totals.pending), _amount(totals.overdue),
+            totals.count, round(totals.collection_rate, 1)]
+
+TOTALS_COLUMNS = (
+    ('Total Fees', AMOUNT), ('Paid', AMOUNT), ('Pending', AMOUNT), ('Overdue', AMOUNT),
+    ('Fees', NUMBER), ('Collection Rate %', NUMBER),
+)
+
+FEES_BREAKDOWN_COLUMNS = (('Student', TEXT), ('Roll No.', TEXT), ('Room', TEXT)) + TOTALS_COLUMNS
+
+def fees_breakdown_rows(data):
+    """The fees report's student-wise breakdown"""
+    index = PayloadIndex(data.get('students', []), data.get('fees', []), data.get('rooms', []))
+    for student, room_number, totals in student_fee_breakdown(index):
+        yield [_name(student), student.get('rollNumber', ''), room_number] + _totals_cells(totals)
+
+FEE_LEDGER_COLUMNS = (
+    ('Fee ID', TEXT), ('Student', TEXT), ('Roll No.', TEXT), ('Room', TEXT), ('Fee Type', TEXT),
+    ('Year', NUMBER), ('Month', NUMBER), ('Amount', AMOUNT), ('Status', TEXT), ('Due Date', TEXT),
+    ('Payment Date', TEXT), ('Payment Method', TEXT),
+)
+
+def fee_ledger_rows(data):
+    """Every fee of the fees report payload, with its student and room"""
+    index = PayloadIndex(data.get('students', []), data.get('fees', []), data.get('rooms', []))
+    students_by_id = index.students_by_id
+    for fee in index.fees:
+        student = students_by_id.get(fee.get('studentId')) or {}
+        room = index.room_for(student) if student else None
+        yield [
+            fee.get('id', ''), _name(student), student.get('rollNumber', ''),
+            room.get('roomNumber', '') if room else '', fee.get('feeType', ''),
+            fee.get('year'), fee.get('month'), fee.get('amount', 0), fee.get('status', ''),
+            fee.get('dueDate', ''), fee.get('paymentDate', '') if fee.get('status') == 'paid' else '',
+            fee.get('paymentMethod', ''),
+        ]
+
+STUDENT_COLUMNS = (
+    ('Student', TEXT), ('Roll No.', TEXT), ('Course', TEXT), ('Year', NUMBER), ('Email', TEXT),
+    ('Phone', TEXT), ('Guardian', TEXT), ('Guardian Phone', TEXT), ('Room', TEXT), ('Monthly Rent', AMOUNT),
+) + TOTALS_COLUMNS
+
+def student_rows(data):
+    """The all-students report, one row per student with their fee totals"""
+    for student_data in data.get('studentsData', []):
+        student = student_data.get('student') or {}
+        room = student_data.get('room') or {}
+        totals = aggregate_fees(student_data.get('fees', [])).overall
+        yield [
+            _name(student), student.get('rollNumber', ''), student.get('course', ''), student.get('year'),
+            student.get('email', ''), student.get('phone', ''), student.get('guardianName', ''),
+            student.get('guardianPhone', ''), room.get('roomNumber', ''), room.get('monthlyRent'),
+        ] + _totals_cells(totals)
+
+# export -> rows -> (columns, row generator, sheet and file name)
+EXPORTS = {
+    'fees': {
+        'students': (FEES_BREAKDOWN_COLUMNS, fees_breakdown_rows, 'Fees Breakdown'),
+        'fees': (FEE_LEDGER_COLUMNS, fee_ledger_rows, 'Fee Ledger'),
+    },
+    'students': {
+        'students': (STUDENT_COLUMNS, student_rows, 'All Students'),
+    },
+}
+
+# Spreadsheet apps run cells starting with these as formulas; numbers such as +91 phones are left alone
+_FORMULA_START = re.compile(r'[=+\-@\t\r]')
+_NUMERIC = re.compile(r'[+-]?[\d\s().,-]*')
+
+def _csv_cell(value):
+    if isinstance(value, str) and _FORMULA_START.match(value) and not _NUMERIC.fullmatch(value):
+        return "'" + value
+    return '' if value is None else value
+
+def stream_csv(columns, rows, chunk_size):
+    """Yield UTF-8 CSV (with a BOM, so Excel reads ₹ and names right) in chunks of about ``chunk_size``"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow([header for header, _ in columns])
+    # The header goes out on its own so the download starts before any row is computed
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+XLSX_NAMESPACE = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '<Relationship Id="rId2" Target="styles.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+        '</Relationships>'),
+    # Cell formats: 0 default, 1 bold (header row), 2 amounts as #,##0.00
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<styleSheet xmlns="{XLSX_NAMESPACE}">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'),
+}
+
+# Characters XML 1.0 does not allow, even escaped
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+def _xlsx_workbook(sheet_name):
+    name = escape(_XML_INVALID.sub('', sheet_name)[:31], {'"': '&quot;'})
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="{XLSX_NAMESPACE}" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets></workbook>')
+
+def _xlsx_cell(value, kind, style=0):
+    if value is None or value == '':
+        return '<c/>'
+    if kind != TEXT and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c s="2"><v>{value}</v></c>' if kind == AMOUNT else f'<c><v>{value}</v></c>'
+    text = escape(_XML_INVALID.sub('', str(value)))
+    style = f' s="{style}"' if style else ''
+    return f'<c t="inlineStr"{style}><is><t xml:space="preserve">{text}</t></is></c>'
+
+def _xlsx_row(number, cells):
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+def stream_xlsx(columns, rows, chunk_size, sheet_name='Sheet1'):
+    """Yield a one-sheet XLSX workbook in chunks of about ``chunk_size`` (before compression)"""
+    buffer = ChunkBuffer()
+    kinds = [kind for _, kind in columns]
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', _xlsx_workbook(sheet_name))
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            header = _xlsx_row(1, [_xlsx_cell(title, TEXT, style=1) for title, _ in columns])
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<worksheet xmlns="{XLSX_NAMESPACE}"><sheetViews><sheetView workbookViewId="0">'
+                '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                f'</sheetView></sheetViews><sheetData>{header}').encode())
+            # The workbook parts and the sheet's ZIP header go out at once; rows follow as they compress
+            yield buffer.drain()
+            pending = []
+            pending_size = 0
+            for number, row in enumerate(rows, start=2):
+                xml = _xlsx_row(number, [_xlsx_cell(value, kind) for value, kind in zip(row, kinds)])
+                pending.append(xml)
+                pending_size += len(xml)
+                if pending_size >= chunk_size:
+                    sheet.write(''.join(pending).encode())
+                    pending.clear()
+                    pending_size = 0
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            sheet.write((''.join(pending) + '</sheetData></worksheet>').encode())
+    yield buffer.drain()
+
+# format -> (stream function, content type, file extension)
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8', 'csv'),
+    'xlsx': (stream_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+def export_stream(export, rows, export_format, data, chunk_size):
+    """``(chunk generator, content type, filename)`` of an export of ``data``"""
+    views = EXPORTS[export]
+    rows = rows or next(iter(views))
+    if rows not in views:
+        raise ExportError(f"Unknown rows {rows!r} for the {export} export (expected {', '.join(views)})")
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown export format {export_format!r} (expected {', '.join(EXPORT_FORMATS)})")
+    columns, make_rows, title = views[rows]
+    stream, content_type, extension = EXPORT_FORMATS[export_format]
+    if export_format == 'xlsx':
+        body = stream(columns, make_rows(data), chunk_size, sheet_name=title)
+    else:
+        body = stream(columns, make_rows(data), chunk_size)
+    filename = f"{title.replace(' ', '-')}-{datetime.now().strftime('%Y%m%d-%H%M')}.{extension}"
+    return body, content_type, filename
@@ -0,0 +1,71 @@
+"""
+Gunicorn server hooks (loaded automatically from the working directory).
+
+Command-line flags in the Procfile and Dockerfile still decide binding,
+workers and threads; this file only adds the Prometheus multiprocess
+bookkeeping that /metrics relies on, precompresses the static assets once,
+before the workers start, warms every worker up before /ready reports it
+(see warmup.py), keeps the admission control state (see admission.py)
+in step with the workers and starts the month-end report precompute
+scheduler (see precompute.py).
+"""
+
+import os
+import shutil
+
+from config import get_config
+
+def on_starting(server):
+    """Start every server run with an empty metrics directory and precompressed static assets"""
+    metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', get_config().METRICS_DIR)
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+    
+    # Workers find the gzip/brotli variants already on disk instead of each compressing them
+    from static_assets import get_static_assets
+    get_static_assets().build_all()
+    
+    # Readiness markers of the previous run's workers
+    warmup_dir = get_config().WARMUP_STATE_DIR
+    shutil.rmtree(warmup_dir, ignore_errors=True)
+    os.makedirs(warmup_dir, exist_ok=True)
+    
+    # Admission leases of the previous run (their pids may belong to this run's workers)
+    admission_path = get_config().ADMISSION_PATH
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.unlink(admission_path + suffix)
+        except FileNotFoundError:
+            pass
+
+def when_ready(server):
+    """With ``preload_app``, render the warm-up documents once in the master so workers fork warm"""
+    if server.cfg.preload_app:
+        import pdf_reports
+        pdf_reports.warm_up()
+
+def post_worker_init(worker):
+    """Warm the worker up in the background; /ready reports 503 until every worker has finished"""
+    from warmup import get_warmup
+    get_warmup(expected_workers=worker.cfg.workers).start()
+    
+    # Renders leave some of this worker's request threads free for receipts and /health
+    from admission import get_admission
+    get_admission().limit_threads(worker.cfg.threads)
+    
+    # Month-end reports are prebuilt off-peak by whichever worker holds the scheduler lock
+    from precompute import get_scheduler
+    get_scheduler().start()
+
+def child_exit(server, worker):
+    """Drop the live gauges (queue depth, renders in flight) and readiness of a worker that exited"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+    
+    # Its replacement has to warm up before the server counts as ready again
+    from warmup import remove_marker
+    remove_marker(get_config().WARMUP_STATE_DIR, worker.pid)
+    
+    # and the renders it had admitted or queued no longer count against the budgets
+    from admission import get_admission
+    get_admission().release_pid(worker.pid)
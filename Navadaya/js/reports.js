@@ -1,10 +1,23 @@
 // Report Generation Module
+
+// localStorage key of the last dataset sync: server cursor plus document fingerprints
+const DATASET_SYNC_KEY = 'navadaya.datasetSync';
+// JSON bodies at least this large are gzipped before upload (where CompressionStream exists)
+const COMPRESS_BODY_MIN_BYTES = 64 * 1024;
+// A busy server answers 429 with Retry-After; reports retry this often, waiting at most this long
+const BUSY_RETRIES = 3;
+const BUSY_RETRY_MAX_SECONDS = 30;
+
 class ReportManager {
     constructor() {
         this.db = null;
         this.students = [];
         this.fees = [];
         this.rooms = [];
+        // Recently downloaded PDFs per endpoint, keyed by the server's ETag
+        this.pdfCache = new Map();
+        // Server dataset snapshot cursor ({epoch, version}) after the last sync, or null
+        this.datasetCursor = null;
         this.init();
     }
 
@@ -13,6 +26,7 @@ class ReportManager {
             if (window.firebase) {
                 this.db = window.firebase.db;
                 await this.loadData();
+                await this.syncDataset();
             } else {
                 setTimeout(() => this.init(), 100);
             }
@@ -54,6 +68,97 @@ class ReportManager {
         }
     }
 
+    // Upload the students, fees and rooms that changed since the last sync to the
+    // server's dataset snapshot, so report requests only need to send filters.
+    // Changes are found by comparing document fingerprints with the ones stored
+    // at the last sync; an unknown or stale cursor sends everything (reset).
+    async syncDataset(reset = false) {
+        const collections = { students: this.students, fees: this.fees, rooms: this.rooms };
+        const fingerprints = {};
+        for (const [name, docs] of Object.entries(collections)) {
+            fingerprints[name] = {};
+            docs.forEach(doc => {
+                fingerprints[name][doc.id] = this.fingerprint(JSON.stringify(doc));
+            });
+        }
+
+        let saved = null;
+        try {
+            saved = JSON.parse(localStorage.getItem(DATASET_SYNC_KEY));
+        } catch (error) {
+            saved = null;
+        }
+        reset = reset || !saved || !saved.cursor || !saved.fingerprints;
+
+        const body = reset ? { reset: true } : { cursor: saved.cursor };
+        body.upserts = {};
+        body.deletes = {};
+        for (const [name, docs] of Object.entries(collections)) {
+            const before = reset ? {} : (saved.fingerprints[name] || {});
+            body.upserts[name] = docs.filter(doc => before[doc.id] !== fingerprints[name][doc.id]);
+            body.deletes[name] = Object.keys(before).filter(id => !(id in fingerprints[name]));
+        }
+
+        try {
+            const response = await fetch('/api/dataset/sync', {
+                method: 'POST',
+                ...await this.jsonRequest(body)
+            });
+            if (response.status === 409 && !reset) {
+                return this.syncDataset(true);
+            }
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const status = await response.json();
+            this.datasetCursor = { epoch: status.epoch, version: status.version };
+            try {
+                localStorage.setItem(DATASET_SYNC_KEY, JSON.stringify({ cursor: this.datasetCursor, fingerprints }));
+            } catch (error) {
+                // Storage full: the next page load sends a full sync instead of a delta
+                localStorage.removeItem(DATASET_SYNC_KEY);
+            }
+            return true;
+        } catch (error) {
+            // Reports fall back to posting the full data
+            console.warn('Dataset sync failed, reports will send their data:', error);
+            this.datasetCursor = null;
+            return false;
+        }
+    }
+
+    // Short, stable hash of a document's JSON (cyrb53)
+    fingerprint(text) {
+        let h1 = 0xdeadbeef, h2 = 0x41c6ce57;
+        for (let i = 0; i < text.length; i++) {
+            const ch = text.charCodeAt(i);
+            h1 = Math.imul(h1 ^ ch, 2654435761);
+            h2 = Math.imul(h2 ^ ch, 1597334677);
+        }
+        h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+        h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+        return (4294967296 * (2097151 & h2) + (h1 >>> 0)).toString(36);
+    }
+
+    // Request a report built from the server's dataset snapshot (filters only),
+    // resyncing once if the server lost the snapshot and falling back to
+    // posting the full payload when there is no synced snapshot
+    async fetchSnapshotReportPdf(url, filters, extra, buildPayload) {
+        if (this.datasetCursor) {
+            try {
+                return await this.fetchReportPdf(url, { ...extra, dataset: this.datasetCursor, filters: filters });
+            } catch (error) {
+                if (error.status !== 409) {
+                    throw error;
+                }
+                if (await this.syncDataset(true)) {
+                    return this.fetchReportPdf(url, { ...extra, dataset: this.datasetCursor, filters: filters });
+                }
+            }
+        }
+        return this.fetchReportPdf(url, buildPayload());
+    }
+
     // Generate individual student report
     async generateStudentReport(studentId) {
         try {
@@ -81,20 +186,9 @@ class ReportManager {
             };
 
             // Call backend API to generate PDF
-            const response = await fetch('/api/generate-student-report', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(reportData)
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
+            const blob = await this.fetchReportPdf('/api/generate-student-report', reportData);
 
             // Download the PDF
-            const blob = await response.blob();
             const url = window.URL.createObjectURL(blob);
             const a = document.createElement('a');
             a.style.display = 'none';
@@ -120,58 +214,51 @@ class ReportManager {
         try {
             Utils.showLoading(true);
 
-            // Prepare comprehensive data for all students
-            const studentsWithDetails = this.students.map(student => {
-                // Find student's fees
-                const studentFees = this.fees.filter(f => f.studentId === student.id);
+            // Full payload, only sent when the server has no synced dataset snapshot
+            const buildPayload = () => {
+                // Prepare comprehensive data for all students
+                const studentsWithDetails = this.students.map(student => {
+                    // Find student's fees
+                    const studentFees = this.fees.filter(f => f.studentId === student.id);
+                    
+                    // Find student's room
+                    const room = student.assignedRoom ? 
+                        this.rooms.find(r => r.id === student.assignedRoom) : null;
+
+                    return {
+                        student: student,
+                        fees: studentFees,
+                        room: room
+                    };
+                });
+
+                // Apply filters if any
+                let filteredData = studentsWithDetails;
                 
-                // Find student's room
-                const room = student.assignedRoom ? 
-                    this.rooms.find(r => r.id === student.assignedRoom) : null;
+                if (filters.year) {
+                    filteredData = filteredData.filter(data => 
+                        data.fees.some(f => f.year == filters.year)
+                    );
+                }
+                if (filters.month) {
+                    filteredData = filteredData.filter(data => 
+                        data.fees.some(f => f.month == filters.month)
+                    );
+                }
 
+                // Prepare data for API
                 return {
-                    student: student,
-                    fees: studentFees,
-                    room: room
+                    studentsData: filteredData,
+                    filters: filters,
+                    reportType: 'all_students'
                 };
-            });
-
-            // Apply filters if any
-            let filteredData = studentsWithDetails;
-            
-            if (filters.year) {
-                filteredData = filteredData.filter(data => 
-                    data.fees.some(f => f.year == filters.year)
-                );
-            }
-            if (filters.month) {
-                filteredData = filteredData.filter(data => 
-                    data.fees.some(f => f.month == filters.month)
-                );
-            }
-
-            // Prepare data for API
-            const reportData = {
-                studentsData: filteredData,
-                filters: filters,
-                reportType: 'all_students'
             };
 
-            // Call backend API to generate PDF
-            const response = await fetch('/api/generate-all-students-report', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(reportData)
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
+            // Call backend API to generate PDF (large reports run as a background job)
+            const blob = await this.fetchSnapshotReportPdf('/api/generate-all-students-report', filters,
+                { reportType: 'all_students' }, buildPayload);
 
             // Download the PDF
-            const blob = await response.blob();
             const url = window.URL.createObjectURL(blob);
             const a = document.createElement('a');
             a.style.display = 'none';
@@ -197,53 +284,45 @@ class ReportManager {
         try {
             Utils.showLoading(true);
 
-            // Filter data based on provided filters
-            let filteredFees = [...this.fees];
-            let filteredStudents = [...this.students];
+            // Full payload, only sent when the server has no synced dataset snapshot
+            const buildPayload = () => {
+                // Filter data based on provided filters
+                let filteredFees = [...this.fees];
+                let filteredStudents = [...this.students];
 
-            // Apply filters
-            if (filters.year) {
-                filteredFees = filteredFees.filter(f => f.year == filters.year);
-            }
-            if (filters.month) {
-                filteredFees = filteredFees.filter(f => f.month == filters.month);
-            }
-            if (filters.status) {
-                filteredFees = filteredFees.filter(f => f.status === filters.status);
-            }
-            if (filters.feeType) {
-                filteredFees = filteredFees.filter(f => f.feeType === filters.feeType);
-            }
+                // Apply filters
+                if (filters.year) {
+                    filteredFees = filteredFees.filter(f => f.year == filters.year);
+                }
+                if (filters.month) {
+                    filteredFees = filteredFees.filter(f => f.month == filters.month);
+                }
+                if (filters.status) {
+                    filteredFees = filteredFees.filter(f => f.status === filters.status);
+                }
+                if (filters.feeType) {
+                    filteredFees = filteredFees.filter(f => f.feeType === filters.feeType);
+                }
 
-            // Only include students who have fees matching the filters
-            if (Object.keys(filters).length > 0) {
-                const studentIdsWithFees = new Set(filteredFees.map(f => f.studentId));
-                filteredStudents = filteredStudents.filter(s => studentIdsWithFees.has(s.id));
-            }
+                // Only include students who have fees matching the filters
+                if (Object.keys(filters).length > 0) {
+                    const studentIdsWithFees = new Set(filteredFees.map(f => f.studentId));
+                    filteredStudents = filteredStudents.filter(s => studentIdsWithFees.has(s.id));
+                }
 
-            // Prepare data for API
-            const reportData = {
-                students: filteredStudents,
-                fees: filteredFees,
-                rooms: this.rooms,
-                filters: filters
+                // Prepare data for API
+                return {
+                    students: filteredStudents,
+                    fees: filteredFees,
+                    rooms: this.rooms,
+                    filters: filters
+                };
             };
 
-            // Call backend API to generate PDF
-            const response = await fetch('/api/generate-fees-report', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(reportData)
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
+            // Call backend API to generate PDF (large reports run as a background job)
+            const blob = await this.fetchSnapshotReportPdf('/api/generate-fees-report', filters, {}, buildPayload);
 
             // Download the PDF
-            const blob = await response.blob();
             const url = window.URL.createObjectURL(blob);
             const a = document.createElement('a');
             a.style.display = 'none';
@@ -264,6 +343,89 @@ class ReportManager {
         }
     }
 
+    // Headers and body for POSTing `data` as JSON; large bodies go gzipped
+    // (Content-Encoding: gzip), which the server decompresses as it reads.
+    async jsonRequest(data) {
+        const headers = { 'Content-Type': 'application/json' };
+        const json = JSON.stringify(data);
+        if (json.length < COMPRESS_BODY_MIN_BYTES || typeof CompressionStream === 'undefined') {
+            return { headers, body: json };
+        }
+        const stream = new Blob([json]).stream().pipeThrough(new CompressionStream('gzip'));
+        headers['Content-Encoding'] = 'gzip';
+        return { headers, body: await new Response(stream).blob() };
+    }
+
+    // POST a report request and return the PDF blob, polling the job API when
+    // the server queues the report instead of rendering it inline (HTTP 202).
+    // PDFs we already hold are offered via If-None-Match; a 304 reuses them.
+    // A 429 (server busy) is retried after its Retry-After, a few times.
+    async fetchReportPdf(url, reportData, busyRetries = BUSY_RETRIES) {
+        const cached = this.pdfCache.get(url) || new Map();
+        const request = await this.jsonRequest(reportData);
+        if (cached.size > 0) {
+            request.headers['If-None-Match'] = [...cached.keys()].join(', ');
+        }
+        const response = await fetch(url, { method: 'POST', ...request });
+
+        if (response.status === 304 && cached.has(response.headers.get('ETag'))) {
+            return cached.get(response.headers.get('ETag'));
+        }
+        if (response.status === 429 && busyRetries > 0) {
+            const seconds = Math.min(Number(response.headers.get('Retry-After')) || 1, BUSY_RETRY_MAX_SECONDS);
+            Utils.showNotification(`Server is busy, retrying in ${seconds}s`, 'info');
+            await new Promise(resolve => setTimeout(resolve, seconds * 1000));
+            return this.fetchReportPdf(url, reportData, busyRetries - 1);
+        }
+        if (!response.ok) {
+            const error = new Error(`HTTP error! status: ${response.status}`);
+            error.status = response.status;
+            throw error;
+        }
+        if (response.status !== 202) {
+            const blob = await response.blob();
+            this.rememberPdf(url, response.headers.get('ETag'), blob);
+            return blob;
+        }
+
+        const job = await response.json();
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const statusResponse = await fetch(job.statusUrl);
+            if (!statusResponse.ok) {
+                throw new Error(`HTTP error! status: ${statusResponse.status}`);
+            }
+            const status = await statusResponse.json();
+            if (status.status === 'failed') {
+                throw new Error(status.error || 'Report job failed');
+            }
+            if (status.status === 'done') {
+                break;
+            }
+            console.log(`Report job ${job.jobId}: ${status.progress.done}/${status.progress.total} students`);
+        }
+
+        const download = await fetch(job.downloadUrl);
+        if (!download.ok) {
+            throw new Error(`HTTP error! status: ${download.status}`);
+        }
+        return download.blob();
+    }
+
+    // Keep the last few PDFs per endpoint so unchanged reports are not downloaded again
+    rememberPdf(url, etag, blob) {
+        if (!etag) {
+            return;
+        }
+        const cached = this.pdfCache.get(url) || new Map();
+        cached.delete(etag);
+        cached.set(etag, blob);
+        while (cached.size > 5) {
+            cached.delete(cached.keys().next().value);
+        }
+        this.pdfCache.set(url, cached);
+    }
+
     // Show report generation modal
     showReportModal() {
         const modal = document.getElementById('reportModal');
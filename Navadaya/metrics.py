@@ -0,0 +1,136 @@
+"""
+Prometheus metrics for the API and the PDF render pipeline.
+
+Requests are served by several gunicorn workers and rendered in render pool
+processes, so prometheus_client runs in multiprocess mode: every process
+writes its samples to small mmap files under ``METRICS_DIR`` and
+``/metrics`` merges them on each scrape. The directory must be chosen
+before prometheus_client is imported, which is why this module sets
+``PROMETHEUS_MULTIPROC_DIR`` first; gunicorn.conf.py clears it when the
+server starts and drops the live gauges of workers that exit.
+
+Render stages are timed with ``render_stages``/``stage``. Stages nest and
+each records only its own (exclusive) time, so the stages of one render
+add up to its total: ``story`` is whatever the renderer does outside the
+other stages.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from config import get_config
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', get_config().METRICS_DIR)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900)
+PDF_SIZE_BUCKETS = tuple(2 ** power * 1024 for power in range(2, 17, 2))  # 4 KB .. 64 MB
+
+HTTP_REQUESTS = Counter(
+    'navadaya_http_requests_total', 'HTTP requests by route, method and status',
+    ['route', 'method', 'status'])
+HTTP_LATENCY = Histogram(
+    'navadaya_http_request_duration_seconds', 'Time to produce the response (streamed bodies excluded)',
+    ['route', 'method'], buckets=LATENCY_BUCKETS)
+RENDER_STAGE_SECONDS = Histogram(
+    'navadaya_render_stage_seconds', 'Time spent per stage of a PDF render',
+    ['report', 'stage'], buckets=LATENCY_BUCKETS)
+PDF_BYTES = Histogram(
+    'navadaya_pdf_bytes', 'Size of rendered PDFs',
+    ['report'], buckets=PDF_SIZE_BUCKETS)
+RENDER_QUEUE_DEPTH = Gauge(
+    'navadaya_render_queue_depth', 'Requests waiting for a render slot',
+    ['lane'], multiprocess_mode='livesum')
+RENDERS_IN_FLIGHT = Gauge(
+    'navadaya_renders_in_flight', 'Render slots currently held',
+    ['lane'], multiprocess_mode='livesum')
+RENDER_REJECTIONS = Counter(
+    'navadaya_render_rejections_total', 'Renders refused because a lane was full or timed out',
+    ['lane', 'reason'])
+ADMISSION_WAIT_SECONDS = Histogram(
+    'navadaya_admission_wait_seconds', 'Time renders waited for an admission lease',
+    ['group'], buckets=LATENCY_BUCKETS)
+ADMISSION_REJECTIONS = Counter(
+    'navadaya_admission_rejections_total', 'Requests answered 429 by admission control',
+    ['group', 'reason'])
+
+def latest():
+    """Return ``(body, content type)`` for a scrape, merged across all processes"""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+class StageTimer:
+    """Exclusive time per stage for one render"""
+
+    def __init__(self, report):
+        self.report = report
+        self.totals = {}
+        self._stack = []
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def leave(self):
+        name, started, nested = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.totals[name] = self.totals.get(name, 0.0) + elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def record(self):
+        for name, seconds in self.totals.items():
+            RENDER_STAGE_SECONDS.labels(self.report, name).observe(seconds)
+
+_current_timer = ContextVar('render_stage_timer', default=None)
+
+@contextmanager
+def render_stages(report):
+    """Time one render of ``report``; time outside nested stages counts as ``story``"""
+    timer = StageTimer(report)
+    token = _current_timer.set(timer)
+    timer.enter('story')
+    try:
+        yield timer
+    finally:
+        timer.leave()
+        _current_timer.reset(token)
+        timer.record()
+
+@contextmanager
+def stage(name):
+    """Attribute the enclosed time to stage ``name`` of the current render (if any)"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    timer.enter(name)
+    try:
+        yield
+    finally:
+        timer.leave()
+
+def instrumented_render(report):
+    """Decorator for renderers: time their stages and record the PDF size"""
+    def decorate(renderer):
+        @wraps(renderer)
+        def render(*args, **kwargs):
+            with render_stages(report):
+                pdf, filename = renderer(*args, **kwargs)
+            PDF_BYTES.labels(report).observe(pdf.size)
+            return pdf, filename
+        return render
+    return decorate
+
+def observe_stage(report, name, seconds):
+    RENDER_STAGE_SECONDS.labels(report, name).observe(seconds)
+
+def observe_request(route, method, status, seconds):
+    HTTP_REQUESTS.labels(route, method, status).inc()
+    HTTP_LATENCY.labels(route, method).observe(seconds)
@@ -0,0 +1,145 @@
+"""
+Output buffers for rendered PDFs.
+
+ReportLab hands the finished document to its output file in one write.
+Writing into an ``io.BytesIO`` and calling ``getvalue()`` kept a second full
+copy of every PDF, and the render pool then pickled those bytes back to the
+request worker. ``PDFSpool`` keeps a small PDF as the single bytes object
+ReportLab produced and spills anything above ``PDF_SPOOL_THRESHOLD`` to a
+temp file, so only a path crosses the process boundary. ``RenderedPDF``
+is what the renderers return; the routes stream it to the client in chunks.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from config import get_config
+
+# Spill files older than this were orphaned (render timed out, worker died)
+SPOOL_ORPHAN_AGE = 3600
+
+class RenderedPDF:
+    """A finished PDF, held in memory (``data``) or in a spool file (``path``)
+
+    Instances are picklable, so they can be returned from render pool
+    workers. A spool file belongs to whoever consumes the PDF: ``open()``,
+    ``save()`` and ``chunks()`` hand it over and remove it from the spool.
+    """
+
+    __slots__ = ('data', 'path', 'size')
+
+    def __init__(self, data=None, path=None, size=0):
+        self.data = data
+        self.path = path
+        self.size = size
+
+    def open(self):
+        """Return a binary file object positioned at the start of the PDF
+
+        A spool file is unlinked as soon as it is open, so it disappears
+        when the caller closes the file, however the response ends.
+        """
+        if self.path is None:
+            return io.BytesIO(self.data)
+        f = open(self.path, 'rb')
+        os.unlink(self.path)
+        return f
+
+    def chunks(self, chunk_size=None):
+        """Yield the PDF in pieces of at most ``chunk_size`` bytes"""
+        chunk_size = chunk_size or get_config().PDF_STREAM_CHUNK_SIZE
+        if self.path is None:
+            view = memoryview(self.data)
+            for start in range(0, self.size, chunk_size):
+                yield view[start:start + chunk_size]
+            return
+        with self.open() as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def save(self, path):
+        """Write the PDF to ``path`` (a spool file is moved, not copied)"""
+        if self.path is None:
+            with open(path, 'wb') as f:
+                f.write(self.data)
+        else:
+            shutil.move(self.path, path)
+            self.path = None
+
+    def discard(self):
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __len__(self):
+        return self.size
+
+class PDFSpool:
+    """Write-only output file for ``SimpleDocTemplate`` that spills large PDFs to disk"""
+
+    def __init__(self, threshold=None, directory=None):
+        settings = get_config()
+        self.threshold = settings.PDF_SPOOL_THRESHOLD if threshold is None else threshold
+        self.directory = directory or settings.PDF_SPOOL_DIR
+        self._chunks = []
+        self._file = None
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        if self._file is None and self.size > self.threshold:
+            self._file = _spool_file(self.directory)
+            for chunk in self._chunks:
+                self._file.write(chunk)
+            self._chunks = []
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            # Keep ReportLab's own bytes object rather than copying it
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def result(self):
+        """Close the spool and return the PDF as a ``RenderedPDF``"""
+        if self._file is not None:
+            self._file.close()
+            return RenderedPDF(path=self._file.name, size=self.size)
+        chunks, self._chunks = self._chunks, []
+        data = chunks[0] if len(chunks) == 1 else b''.join(chunks)
+        return RenderedPDF(data=data, size=self.size)
+
+_swept_at = None
+_sweep_lock = threading.Lock()
+
+def _spool_file(directory):
+    os.makedirs(directory, exist_ok=True)
+    _sweep_orphans(directory)
+    return tempfile.NamedTemporaryFile(dir=directory, prefix='pdf-', suffix='.pdf', delete=False)
+
+def _sweep_orphans(directory):
+    """Remove spill files nobody collected, at most once a minute per process"""
+    global _swept_at
+    with _sweep_lock:
+        if _swept_at is not None and time.monotonic() - _swept_at < 60:
+            return
+        _swept_at = time.monotonic()
+    cutoff = time.time() - SPOOL_ORPHAN_AGE
+    for entry in os.scandir(directory):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,189 @@
+"""
+Shared ParagraphStyle and TableStyle registry for the PDF renderers.
+
+The styles are built once when the module is imported (or when a render
+pool worker warms up) and reused by every report and receipt instead of
+being reconstructed per request. Styles are read-only after import:
+``Table.setStyle`` copies the commands it is given, so one ``TableStyle``
+instance can safely back any number of tables.
+"""
+
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.platypus import TableStyle
+
+_base = getSampleStyleSheet()
+
+def _style(name, parent, **attrs):
+    return ParagraphStyle(name, parent=_base[parent], **attrs)
+
+_report_footer = _style('Footer', 'Normal', fontSize=8, alignment=TA_CENTER, textColor=colors.grey)
+
+PARAGRAPH_STYLES = {
+    'student-report': {
+        'title': _style('CustomTitle', 'Heading1', fontSize=20, spaceAfter=30, alignment=TA_CENTER, textColor=colors.darkblue),
+        'header': _style('CustomHeader', 'Heading2', fontSize=14, spaceAfter=12, textColor=colors.darkgreen),
+        'normal': _style('CustomNormal', 'Normal', fontSize=10, spaceAfter=6),
+        'footer': _report_footer,
+    },
+    'all-students-report': {
+        'title': _style('CustomTitle', 'Heading1', fontSize=20, spaceAfter=30, alignment=TA_CENTER, textColor=colors.darkblue),
+        'header': _style('CustomHeader', 'Heading2', fontSize=16, spaceAfter=15, textColor=colors.darkgreen),
+        'sub_header': _style('SubHeader', 'Heading3', fontSize=12, spaceAfter=10, textColor=colors.darkblue),
+        'normal': _style('CustomNormal', 'Normal', fontSize=9, spaceAfter=6),
+        'footer': _report_footer,
+    },
+    'fees-report': {
+        'title': _style('CustomTitle', 'Heading1', fontSize=18, spaceAfter=30, alignment=TA_CENTER, textColor=colors.darkblue),
+        'header': _style('CustomHeader', 'Heading2', fontSize=12, spaceAfter=12, textColor=colors.darkgreen),
+        'normal': _style('CustomNormal', 'Normal', fontSize=9, spaceAfter=6),
+        'footer': _report_footer,
+    },
+    'receipt': {
+        'title': _style('ReceiptTitle', 'Heading1', fontSize=20, spaceAfter=20, alignment=TA_CENTER, textColor=colors.darkblue),
+        'header': _style('ReceiptHeader', 'Heading2', fontSize=14, spaceAfter=12, textColor=colors.darkgreen),
+        'normal': _style('ReceiptNormal', 'Normal', fontSize=11, spaceAfter=8),
+        'right_align': _style('RightAlign', 'Normal', fontSize=11, alignment=TA_RIGHT),
+        'qr_description': _style('QRDesc', 'Normal', fontSize=9, spaceAfter=6),
+        'qr_error': _style('QRError', 'Normal', fontSize=9, alignment=TA_CENTER, textColor=colors.grey),
+        'security_warning': _style('SecurityWarning', 'Normal', fontSize=9, alignment=TA_CENTER, textColor=colors.red, spaceAfter=15),
+        'footer': _style('Footer', 'Normal', fontSize=9, alignment=TA_CENTER, textColor=colors.grey, spaceAfter=10),
+        'generated': _style('Generated', 'Normal', fontSize=8, alignment=TA_CENTER, textColor=colors.grey),
+    },
+}
+
+TABLE_STYLES = {
+    'student-report': {
+        'info': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+        'summary': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+        'fees': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+    },
+    'all-students-report': {
+        'student': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+        ]),
+        'fees-summary': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ]),
+        'overall': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+    },
+    'fees-report': {
+        'summary': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+        'breakdown': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+    },
+    'receipt': {
+        'header': TableStyle([
+            ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+        ]),
+        'student': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]),
+        'fee': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('BACKGROUND', (0, 5), (-1, 5), colors.lightgreen),
+            ('FONTNAME', (0, 5), (-1, 5), 'Helvetica-Bold'),
+        ]),
+        'amount': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightblue),
+            ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 14),
+            ('GRID', (0, 0), (-1, -1), 2, colors.darkblue),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ]),
+        'security': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (-1, -1), 'Courier'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightyellow),
+            ('GRID', (0, 0), (-1, -1), 1, colors.orange),
+        ]),
+        'qr': TableStyle([
+            ('ALIGN', (0, 0), (0, 0), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (1, 0), (1, 0), 15),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 1, colors.darkgrey),
+        ]),
+    },
+}
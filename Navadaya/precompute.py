@@ -0,0 +1,354 @@
+"""
+Month-end reports rendered ahead of time into a local artifact store.
+
+The heaviest report requests arrive together: the first days of each
+month, right after js/fees.js has created the month's ``monthly_rent``
+fees, everyone asks for the fees report and the all-students report of
+that month. Large ones used to become report jobs (202, then polling).
+This module renders those standard variants off-peak from the server's
+dataset snapshot (see dataset.py) and keeps the PDFs in
+``PRECOMPUTE_DIR``:
+
+* for each of the last ``PRECOMPUTE_MONTHS`` months (the current one
+  included), the fees report and the all-students report filtered by
+  ``{"year": "YYYY", "month": "MM"}``, as the reports page sends them;
+* an artifact is only rebuilt when the snapshot has changed since it was
+  rendered, so a quiet night costs one snapshot refresh;
+* artifacts are kept for ``PRECOMPUTE_RETENTION_DAYS`` and at most
+  ``PRECOMPUTE_MAX_BYTES`` in total (oldest dropped first).
+
+Each artifact is addressed by the same ``payload_key`` the report cache
+uses, both for the filters-plus-cursor request and for the full payload
+the page posts when it has no synced snapshot, so the existing report
+routes serve a prebuilt PDF as soon as a request's filters and data match
+it, ETag and 304 included.
+
+Renders run either in the background, inside one gunicorn worker per host
+during the off-peak ``PRECOMPUTE_HOURS``, or from cron::
+
+    python precompute.py                 # build whatever is out of date
+    python precompute.py --month 2025-12 # one month, even outside the window
+    python precompute.py --list
+    python precompute.py --prune
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+from datetime import date, datetime
+
+from admission import get_admission
+from config import get_config
+from dataset import get_dataset
+from render_pool import get_engine
+from renderers import render_all_students_report, render_fees_report
+from report_cache import payload_key
+
+# Report kind -> (render lane, renderer, number of students in its payload)
+MONTHLY_REPORTS = {
+    'fees-report': ('fees-job', render_fees_report, lambda data: len(data.get('students', []))),
+    'all-students-report': ('all-students-job', render_all_students_report,
+                            lambda data: len(data.get('studentsData', []))),
+}
+
+_VARIANT_ID = re.compile(r'^[a-z-]+-\d{4}-\d{2}$')
+
+def month_filters(months, today=None):
+    """Filters of the current month and the ``months - 1`` before it, newest first"""
+    today = today or date.today()
+    year, month = today.year, today.month
+    filters = []
+    for _ in range(months):
+        filters.append({'year': str(year), 'month': f"{month:02d}"})
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return filters
+
+def variant_id(kind, filters):
+    return f"{kind}-{filters['year']}-{filters['month']}"
+
+def parse_hours(spec):
+    """Local hours in a ``start-end`` window (end excluded, may wrap past midnight); empty is none"""
+    if not spec.strip():
+        return frozenset()
+    start, _, end = spec.partition('-')
+    start = int(start)
+    end = int(end) % 24 if end else start + 1
+    if end <= start:
+        end += 24
+    return frozenset(hour % 24 for hour in range(start, end))
+
+class ArtifactStore:
+    """Prebuilt PDFs as ``<variant>.pdf`` + ``<variant>.json``, found by payload key via ``<key>.key`` files"""
+
+    def __init__(self, directory, retention_days, max_bytes):
+        self.directory = directory
+        self.retention = retention_days * 24 * 3600
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name, suffix):
+        return os.path.join(self.directory, f"{name}.{suffix}")
+
+    def _tmp_path(self, name, suffix):
+        return f"{self._path(name, suffix)}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def manifest(self, variant):
+        try:
+            with open(self._path(variant, 'json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def get(self, key):
+        """Return ``(open PDF file, filename)`` of the artifact answering ``key``, or None"""
+        try:
+            with open(self._path(key, 'key')) as f:
+                variant = f.read().strip()
+            manifest = self.manifest(variant)
+            # A rebuild drops its old keys first; the manifest check covers a lookup racing it
+            if manifest is None or key not in manifest['keys']:
+                return None
+            return open(self._path(variant, 'pdf'), 'rb'), manifest['filename']
+        except (FileNotFoundError, KeyError):
+            return None
+
+    def put(self, variant, pdf, filename, keys, **details):
+        """Store a RenderedPDF as ``variant``, replacing its previous build and that build's keys"""
+        previous = self.manifest(variant)
+        if previous is not None:
+            self._drop_keys(previous.get('keys', []))
+        tmp_path = self._tmp_path(variant, 'pdf')
+        pdf.save(tmp_path)
+        os.replace(tmp_path, self._path(variant, 'pdf'))
+        manifest = dict(details, variant=variant, filename=filename, keys=keys, size=pdf.size,
+                        createdAt=time.time())
+        self._write(variant, 'json', json.dumps(manifest))
+        for key in keys:
+            self._write(key, 'key', variant)
+        return manifest
+
+    def _write(self, name, suffix, text):
+        tmp_path = self._tmp_path(name, suffix)
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, self._path(name, suffix))
+
+    def _drop_keys(self, keys):
+        for key in keys:
+            try:
+                os.unlink(self._path(key, 'key'))
+            except FileNotFoundError:
+                pass
+
+    def delete(self, variant):
+        manifest = self.manifest(variant)
+        if manifest is not None:
+            self._drop_keys(manifest.get('keys', []))
+        for suffix in ('json', 'pdf'):
+            try:
+                os.unlink(self._path(variant, suffix))
+            except FileNotFoundError:
+                pass
+
+    def list(self):
+        """Manifests of every artifact, newest first"""
+        manifests = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json') and _VARIANT_ID.match(name[:-len('.json')]):
+                manifest = self.manifest(name[:-len('.json')])
+                if manifest is not None:
+                    manifests.append(manifest)
+        return sorted(manifests, key=lambda manifest: manifest['createdAt'], reverse=True)
+
+    def prune(self):
+        """Drop artifacts past the retention, then the oldest until within ``max_bytes``; returns their ids"""
+        now = time.time()
+        dropped = []
+        total_bytes = 0
+        for manifest in self.list():
+            total_bytes += manifest['size']
+            if now - manifest['createdAt'] > self.retention or total_bytes > self.max_bytes:
+                self.delete(manifest['variant'])
+                dropped.append(manifest['variant'])
+        # Key files whose artifact is gone, and temp files of interrupted writes
+        live = {key for manifest in self.list() for key in manifest['keys']}
+        for entry in os.scandir(self.directory):
+            stale_key = entry.name.endswith('.key') and entry.name[:-len('.key')] not in live
+            stale_tmp = entry.name.endswith('.tmp') and now - entry.stat().st_mtime > 3600
+            if stale_key or stale_tmp:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+        return dropped
+
+def snapshot_cursor():
+    """The dataset snapshot's current ``{epoch, version}``"""
+    epoch, version = get_dataset().refresh()
+    return {'epoch': epoch, 'version': version}
+
+def build(store, kind, filters, force=False):
+    """Render ``kind`` for ``filters`` from the current snapshot unless the stored build is current
+
+    Returns the new manifest, or None when the artifact was up to date or
+    nothing in the snapshot matches the filters.
+    """
+    lane, renderer, count = MONTHLY_REPORTS[kind]
+    variant = variant_id(kind, filters)
+    data, snapshot = get_dataset().report_payload(kind, filters, snapshot_cursor())
+    # The key generate_report_or_job computes for a filters-plus-cursor request
+    dataset_key = payload_key(kind, {'dataset': snapshot, 'filters': filters})
+    previous = store.manifest(variant)
+    if not force and previous is not None and dataset_key in previous.get('keys', []):
+        return None
+    total = count(data)
+    if total == 0:
+        return None
+
+    started = time.perf_counter()
+    admission = get_admission()
+    # Background lease: waits behind live renders instead of being refused
+    with admission.acquire(lane, admission.weight(lane, total), wait=get_engine().lanes[lane].timeout,
+                           background=True):
+        pdf, filename = get_engine().render(lane, renderer, data)
+    keys = [dataset_key, payload_key(kind, data)]
+    return store.put(variant, pdf, filename, keys, kind=kind, filters=filters, snapshot=snapshot,
+                     students=total, seconds=round(time.perf_counter() - started, 3))
+
+def precompute(store, months=None, filters=None, force=False):
+    """Bring every monthly variant up to date, then prune; returns ``(built, failed)`` manifests/errors"""
+    if filters is None:
+        filters = month_filters(get_config().PRECOMPUTE_MONTHS if months is None else months)
+    built, failed = [], []
+    for month in filters:
+        for kind in MONTHLY_REPORTS:
+            try:
+                manifest = build(store, kind, month, force)
+            except Exception as e:
+                failed.append(f"{variant_id(kind, month)}: {type(e).__name__}: {e}")
+                continue
+            if manifest is not None:
+                built.append(manifest)
+    store.prune()
+    return built, failed
+
+class Scheduler:
+    """Runs ``precompute`` every ``interval`` seconds during ``hours``, in one process per host
+
+    Every gunicorn worker starts one; the first to take an exclusive lock
+    on ``scheduler.lock`` in the store directory does the work for as long
+    as it lives, and another takes over on its next tick if it exits.
+    """
+
+    def __init__(self, store, hours, interval):
+        self.store = store
+        self.hours = hours
+        self.interval = interval
+        self.last_run = None
+        self._lock_file = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self._thread is not None or not self.hours:
+            return
+        self._thread = threading.Thread(target=self.run, name='precompute', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _is_leader(self):
+        if self._lock_file is None:
+            lock_file = open(os.path.join(self.store.directory, 'scheduler.lock'), 'w')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+        return True
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            if datetime.now().hour not in self.hours or not self._is_leader():
+                continue
+            try:
+                built, failed = precompute(self.store)
+            except Exception as e:
+                built, failed = [], [f"{type(e).__name__}: {e}"]
+            self.last_run = {'at': time.time(), 'built': [manifest['variant'] for manifest in built],
+                             'failed': failed}
+
+_store = None
+_scheduler = None
+_precompute_pid = None
+_precompute_lock = threading.Lock()
+
+def _init():
+    global _store, _scheduler, _precompute_pid
+    if _store is None or _precompute_pid != os.getpid():
+        settings = get_config()
+        _store = ArtifactStore(settings.PRECOMPUTE_DIR, settings.PRECOMPUTE_RETENTION_DAYS,
+                               settings.PRECOMPUTE_MAX_BYTES)
+        _scheduler = Scheduler(_store, parse_hours(settings.PRECOMPUTE_HOURS), settings.PRECOMPUTE_INTERVAL)
+        _precompute_pid = os.getpid()
+
+def get_artifact_store():
+    """Return this process's artifact store"""
+    with _precompute_lock:
+        _init()
+        return _store
+
+def get_scheduler():
+    """Return this process's precompute scheduler (not started), creating it after any fork"""
+    with _precompute_lock:
+        _init()
+        return _scheduler
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the month-end fee reports into the artifact store")
+    parser.add_argument('--month', action='append', metavar='YYYY-MM',
+                        help="build this month (repeatable) instead of the last PRECOMPUTE_MONTHS months")
+    parser.add_argument('--force', action='store_true', help="rebuild even when an artifact is current")
+    parser.add_argument('--list', action='store_true', help="list the stored artifacts and exit")
+    parser.add_argument('--prune', action='store_true', help="apply the retention limits and exit")
+    args = parser.parse_args()
+
+    store = get_artifact_store()
+    if args.list:
+        for manifest in store.list():
+            created = datetime.fromtimestamp(manifest['createdAt']).isoformat(timespec='seconds')
+            print(f"{manifest['variant']:<32} {manifest['students']:>6} students {manifest['size'] / 1024:>9.0f} KiB"
+                  f"  {created}  snapshot {manifest['snapshot']['version']}")
+        return
+    if args.prune:
+        dropped = store.prune()
+        print(f"Pruned {len(dropped)} artifacts" + (f": {', '.join(dropped)}" if dropped else ''))
+        return
+
+    filters = None
+    if args.month:
+        filters = []
+        for month in args.month:
+            try:
+                parsed = datetime.strptime(month, '%Y-%m')
+            except ValueError:
+                parser.error(f"--month {month!r} is not YYYY-MM")
+            filters.append({'year': str(parsed.year), 'month': f"{parsed.month:02d}"})
+    built, failed = precompute(store, filters=filters, force=args.force)
+    for manifest in built:
+        print(f"Built {manifest['variant']}: {manifest['students']} students, "
+              f"{manifest['size'] / 1024:.0f} KiB in {manifest['seconds']:.1f}s")
+    print(f"{len(built)} built, {len(failed)} failed; artifacts in {store.directory}")
+    for error in failed:
+        print(f"  FAILED {error}")
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Opt-in cProfile capture for slow report requests.
+
+Profiling is off unless a request asks for it (``X-Profile: 1`` header or
+``?profile=1``, together with an ``X-Admin-Token`` matching
+``PROFILE_ADMIN_TOKEN``) or is picked by ``PROFILE_SAMPLE_RATE``. A
+profiled request produces up to two cProfile dumps in ``PROFILE_DIR``:
+
+- ``route``: the Flask handler on the request thread (payload parsing,
+  cache lookups, waiting for the render pool);
+- ``render``: the renderer inside the render pool worker process, where
+  ReportLab layout, fee aggregation and QR encoding actually run.
+
+Requests that do not ask for a profile only pay for a header lookup.
+"""
+
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+
+from config import get_config
+
+PROFILE_PARTS = ('route', 'render')
+
+def profiling_requested(req):
+    """Whether this request should be profiled (admin flag or sampling)"""
+    settings = get_config()
+    flag = req.headers.get('X-Profile') or req.args.get('profile')
+    if flag and flag not in ('0', 'false') and is_admin(req):
+        return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+def is_admin(req):
+    token = get_config().PROFILE_ADMIN_TOKEN
+    supplied = req.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+class ProfiledRenderer:
+    """Picklable wrapper that profiles a renderer in whichever process runs it"""
+
+    def __init__(self, renderer, path):
+        self.renderer = renderer
+        self.path = path
+
+    def __call__(self, *args, **kwargs):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return self.renderer(*args, **kwargs)
+        finally:
+            profiler.disable()
+            profiler.dump_stats(self.path)
+
+class ProfileStore:
+    """cProfile dumps plus a small JSON summary per profiled request"""
+
+    def __init__(self, directory, max_profiles):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        os.makedirs(directory, exist_ok=True)
+
+    def new_id(self):
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    def path(self, profile_id, part):
+        return os.path.join(self.directory, f"{profile_id}.{part}.prof")
+
+    def _meta_path(self, profile_id):
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def valid_id(self, profile_id):
+        return all(c.isalnum() or c == '-' for c in profile_id)
+
+    def save(self, profile_id, meta):
+        tmp_path = f"{self._meta_path(profile_id)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(profile_id))
+        self.prune()
+
+    def get(self, profile_id):
+        if not self.valid_id(profile_id):
+            return None
+        try:
+            with open(self._meta_path(profile_id)) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        # A job's render profile lands after the request that started it has finished
+        meta['parts'] = [part for part in PROFILE_PARTS if os.path.exists(self.path(profile_id, part))]
+        return meta
+
+    def list(self):
+        """Summaries of every stored profile, newest first"""
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                meta = self.get(entry.name[:-len('.json')])
+                if meta is not None:
+                    profiles.append(meta)
+        profiles.sort(key=lambda meta: meta['createdAt'], reverse=True)
+        return profiles
+
+    def report(self, profile_id, sort='cumulative', limit=40):
+        """Plain-text pstats listing of each part of a profile"""
+        meta = self.get(profile_id)
+        if meta is None:
+            return None
+        out = io.StringIO()
+        out.write(f"{meta['method']} {meta['path']} -> {meta['status']} in {meta['duration']:.3f}s\n")
+        for part in meta['parts']:
+            out.write(f"\n===== {part} =====\n")
+            stats = pstats.Stats(self.path(profile_id, part), stream=out)
+            stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def prune(self):
+        """Keep only the newest ``max_profiles`` profiles"""
+        for meta in self.list()[self.max_profiles:]:
+            for name in [f"{meta['id']}.json"] + [f"{meta['id']}.{part}.prof" for part in PROFILE_PARTS]:
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_profile_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            settings = get_config()
+            _store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX)
+        return _store
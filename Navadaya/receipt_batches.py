@@ -0,0 +1,54 @@
+"""
+Batch fee receipts: streamed ZIP packaging for /api/generate-fee-receipts/batch.
+
+Receipts are rendered in parallel on the render pool and each PDF is written
+into the ZIP as soon as its worker finishes, so the client starts receiving
+bytes after the first receipt rather than after the whole batch.
+"""
+
+import zipfile
+
+class ChunkBuffer:
+    """Write-only file object that collects what ZipFile writes until drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def validate_batch(receipts, max_receipts):
+    """Return an error message for an unusable batch payload, or None"""
+    if not isinstance(receipts, list) or not receipts:
+        return "'receipts' must be a non-empty list of {student, fee, room} objects"
+    if len(receipts) > max_receipts:
+        return f"A batch can contain at most {max_receipts} receipts"
+    if not all(isinstance(receipt, dict) for receipt in receipts):
+        return "Every receipt must be an object with student, fee and room"
+    return None
+
+def stream_receipts_zip(rendered):
+    """Yield a ZIP archive chunk by chunk from ``(RenderedPDF, filename)`` results"""
+    buffer = ChunkBuffer()
+    seen = {}
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for pdf, filename in rendered:
+            # Two fees can map to the same receipt filename; keep both
+            count = seen.get(filename, 0)
+            seen[filename] = count + 1
+            if count:
+                filename = filename.replace('.pdf', f"-{count + 1}.pdf")
+            with archive.open(filename, 'w') as entry:
+                for chunk in pdf.chunks():
+                    entry.write(chunk)
+                    yield buffer.drain()
+    yield buffer.drain()
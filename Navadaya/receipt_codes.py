@@ -0,0 +1,59 @@
+"""
+Deterministic, keyed verification codes for fee receipts.
+
+Receipts used to derive their verification code and security hash from
+Python's built-in ``hash()`` over a string that included the render time.
+``hash()`` of a str is salted per process (PYTHONHASHSEED), so every
+gunicorn worker and every restart printed different codes for the same fee.
+
+Codes are now HMAC-SHA256 digests keyed with ``SECRET_KEY``
+(``SESSION_SECRET``) over the receipt fields and its issue time. The issue
+time is the fee's payment date (or an explicit ``issuedAt`` in the request)
+rather than the wall clock, so re-rendering a receipt reproduces the same
+codes on any worker and the PDF can be cached or re-derived instead of
+stored. Only the secret can mint valid codes; rotating it changes the codes
+of receipts rendered afterwards (issued ones stay in the receipt ledger).
+"""
+
+import hashlib
+import hmac
+from datetime import datetime
+
+from config import get_config
+
+# Separates fields so ('ab', 'c') and ('a', 'bc') never produce the same message
+FIELD_SEPARATOR = '\x1f'
+
+def _digest(purpose, *fields):
+    key = get_config().SECRET_KEY.encode()
+    message = FIELD_SEPARATOR.join([purpose, *(str(field) for field in fields)])
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+def make_verification_code(fee_id, roll_number, amount, issued_at):
+    """``NNNNNN-NNN`` code printed on the receipt and carried in its QR code"""
+    value = int.from_bytes(_digest('verification', fee_id, roll_number, amount, issued_at.isoformat())[:8], 'big')
+    return f"{value % 1000000:06d}-{value // 1000000 % 1000:03d}"
+
+def make_security_code(student_name, roll_number, amount, fee_type, issued_at):
+    """12-digit hex tamper check printed in the receipt's security table"""
+    digest = _digest('security', student_name, roll_number, amount, fee_type, issued_at.isoformat())
+    return digest[:6].hex().upper()
+
+def _parse_time(value):
+    if isinstance(value, dict):
+        # Firestore Timestamp as serialised by the client SDK
+        seconds = value.get('seconds', value.get('_seconds'))
+        return datetime.fromtimestamp(seconds) if isinstance(seconds, (int, float)) else None
+    if isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        # Naive local time, like the rest of the receipt
+        return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+    return None
+
+def receipt_issue_time(data, fee_data):
+    """When a receipt counts as issued: ``issuedAt``, else the payment date, else now"""
+    issued_at = _parse_time(data.get('issuedAt')) or _parse_time(fee_data.get('paymentDate')) or datetime.now()
+    return issued_at.replace(microsecond=0)
@@ -0,0 +1,159 @@
+"""
+Append-only ledger of issued fee receipts, for server-side verification.
+
+Every receipt the receipt renderers issue (single or batch) is appended to
+a SQLite database at ``RECEIPT_LEDGER_PATH`` with the codes printed on it:
+receipt number, verification code, the security hash in the security table
+and the one carried in the QR code. Verification is an index lookup on
+(receipt number, verification code), instead of the browser fetching the
+student and every fee document on each check.
+
+Receipt numbers repeat when a fee's receipt is printed again, so rows are
+keyed by the pair; triggers reject UPDATE and DELETE so issued receipts
+cannot be rewritten. The database runs in WAL mode, so gunicorn workers
+and render pool processes (which write the rows) can use it concurrently;
+each process and thread opens its own connection.
+"""
+
+import os
+import sqlite3
+import threading
+
+from config import get_config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS receipts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    receipt_number TEXT NOT NULL,
+    verification_code TEXT NOT NULL,
+    security_code TEXT NOT NULL,
+    qr_hash TEXT NOT NULL,
+    fee_id TEXT,
+    student_id TEXT,
+    roll_number TEXT,
+    student_name TEXT,
+    fee_type TEXT,
+    amount REAL,
+    issued_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS receipts_by_code ON receipts (receipt_number, verification_code);
+CREATE TRIGGER IF NOT EXISTS receipts_no_update BEFORE UPDATE ON receipts
+BEGIN SELECT RAISE(ABORT, 'the receipt ledger is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS receipts_no_delete BEFORE DELETE ON receipts
+BEGIN SELECT RAISE(ABORT, 'the receipt ledger is append-only'); END;
+"""
+
+COLUMNS = ('receipt_number', 'verification_code', 'security_code', 'qr_hash', 'fee_id', 'student_id',
+           'roll_number', 'student_name', 'fee_type', 'amount', 'issued_at')
+
+# JSON field names of the verification API
+FIELD_NAMES = {
+    'receipt_number': 'receiptNumber',
+    'verification_code': 'verificationCode',
+    'security_code': 'securityCode',
+    'qr_hash': 'qrHash',
+    'fee_id': 'feeId',
+    'student_id': 'studentId',
+    'roll_number': 'rollNumber',
+    'student_name': 'studentName',
+    'fee_type': 'feeType',
+    'amount': 'amount',
+    'issued_at': 'issuedAt',
+}
+
+class ReceiptLedger:
+    """Issued receipts in an append-only SQLite table"""
+
+    def __init__(self, path, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @property
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def record(self, receipts):
+        """Append issued receipts (dicts keyed by ``COLUMNS``) in one transaction"""
+        rows = [tuple(receipt.get(column) for column in COLUMNS) for receipt in receipts]
+        if not rows:
+            return
+        with self.connection as conn:
+            conn.executemany(
+                f"INSERT INTO receipts ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+
+    def lookup(self, receipt_number, verification_code):
+        """Every issue of this receipt number with this verification code"""
+        rows = self.connection.execute(
+            'SELECT * FROM receipts WHERE receipt_number = ? AND verification_code = ? ORDER BY id',
+            (receipt_number, verification_code)).fetchall()
+        return [dict(row) for row in rows]
+
+    def verify(self, claim):
+        """Check one scanned or typed receipt against the ledger
+
+        ``claim`` carries ``receiptNumber`` and ``verificationCode`` (or the
+        QR fields ``rcp``/``vc``) and optionally ``securityHash`` (``sh``)
+        and ``rollNumber`` (``roll``), which must then match too. ``code``
+        says why a receipt failed; ``not_issued`` also covers receipts printed
+        before the ledger existed.
+        """
+        receipt_number = str(claim.get('receiptNumber') or claim.get('rcp') or '').strip().upper()
+        verification_code = str(claim.get('verificationCode') or claim.get('vc') or '').strip().upper()
+        security_hash = str(claim.get('securityHash') or claim.get('sh') or '').strip().upper()
+        roll_number = str(claim.get('rollNumber') or claim.get('roll') or '').strip()
+        result = {'receiptNumber': receipt_number, 'verificationCode': verification_code, 'valid': False}
+        if not receipt_number or not verification_code:
+            result.update(code='missing_fields', reason='receiptNumber and verificationCode are required')
+            return result
+
+        issued = self.lookup(receipt_number, verification_code)
+        if not issued:
+            result.update(code='not_issued', reason='No receipt was issued with this number and verification code')
+            return result
+        if security_hash:
+            issued = [row for row in issued if security_hash in (row['security_code'].upper(), row['qr_hash'].upper())]
+            if not issued:
+                result.update(code='hash_mismatch', reason='Security hash does not match the issued receipt')
+                return result
+        if roll_number:
+            issued = [row for row in issued if row['roll_number'] == roll_number]
+            if not issued:
+                result.update(code='roll_mismatch', reason='Roll number does not match the issued receipt')
+                return result
+
+        result.update(valid=True, code='issued')
+        result['receipt'] = {FIELD_NAMES[key]: value for key, value in issued[-1].items() if key in FIELD_NAMES}
+        return result
+
+    def verify_many(self, claims):
+        """Verify a batch of receipts (an audit of scanned receipts) on one connection"""
+        return [self.verify(claim) for claim in claims]
+
+_ledger = None
+_ledger_pid = None
+_ledger_lock = threading.Lock()
+
+def get_receipt_ledger():
+    """Return this process's ledger, reopening it after any fork"""
+    global _ledger, _ledger_pid
+    with _ledger_lock:
+        if _ledger is None or _ledger_pid != os.getpid():
+            _ledger = ReceiptLedger(get_config().RECEIPT_LEDGER_PATH)
+            _ledger_pid = os.getpid()
+        return _ledger
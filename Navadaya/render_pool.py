@@ -0,0 +1,209 @@
+"""
+Process-pool rendering engine for the PDF endpoints.
+
+ReportLab layout is pure Python and CPU bound, so the routes hand story
+building and ``doc.build`` to a bounded pool of pre-warmed worker
+processes instead of running it on the request thread. Every endpoint gets
+its own lane with a wait-queue limit and a timeout; the heavy report lanes
+share a budget that always leaves one process free for receipts and
+single-student reports.
+"""
+
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeout, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from config import get_config
+from metrics import RENDER_QUEUE_DEPTH, RENDERS_IN_FLIGHT, RENDER_REJECTIONS
+
+class RenderQueueFull(Exception):
+    """Raised when a lane already has its maximum number of waiting requests"""
+
+class RenderTimeout(Exception):
+    """Raised when a render does not finish within its lane timeout"""
+
+def _warm_worker():
+    """Pool initializer: render throwaway documents so the first real render is fast"""
+    import pdf_reports
+    pdf_reports.warm_up()
+
+def _noop():
+    return os.getpid()
+
+class RenderLane:
+    """Admission state for one endpoint: a slot semaphore plus a wait-queue cap"""
+
+    def __init__(self, name, slots, max_queue, timeout):
+        self.name = name
+        self.slots = slots
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.waiting = 0
+        self._lock = threading.Lock()
+        self._queue_depth = RENDER_QUEUE_DEPTH.labels(name)
+        self._in_flight = RENDERS_IN_FLIGHT.labels(name)
+
+    def rejected(self, reason):
+        RENDER_REJECTIONS.labels(self.name, reason).inc()
+
+    def enter(self, max_slots=1):
+        """Reserve up to ``max_slots`` pool slots (at least one, waiting if needed)
+        
+        Returns ``(seconds left of the lane timeout, slots taken)``.
+        """
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.rejected('queue_full')
+                raise RenderQueueFull(f"Too many pending {self.name} requests, please retry shortly")
+            self.waiting += 1
+        self._queue_depth.inc()
+        started = time.monotonic()
+        try:
+            if not self.slots.acquire(timeout=self.timeout):
+                self.rejected('wait_timeout')
+                raise RenderTimeout(f"Timed out waiting for a free renderer for {self.name}")
+        finally:
+            with self._lock:
+                self.waiting -= 1
+            self._queue_depth.dec()
+        taken = 1
+        while taken < max_slots and self.slots.acquire(blocking=False):
+            taken += 1
+        self._in_flight.inc(taken)
+        return self.timeout - (time.monotonic() - started), taken
+
+    def leave(self, count=1):
+        self._in_flight.dec(count)
+        for _ in range(count):
+            self.slots.release()
+
+class RenderEngine:
+    """Bounded, pre-warmed process pool with per-endpoint lanes"""
+
+    def __init__(self, workers=None, lanes=None, heavy_lanes=None):
+        settings = get_config()
+        self.workers = settings.RENDER_POOL_WORKERS if workers is None else workers
+        lanes = settings.RENDER_LANES if lanes is None else lanes
+        heavy_lanes = settings.RENDER_HEAVY_LANES if heavy_lanes is None else heavy_lanes
+
+        capacity = max(1, self.workers)
+        heavy_slots = threading.BoundedSemaphore(max(1, capacity - 1))
+        self.lanes = {}
+        for name, (max_queue, timeout) in lanes.items():
+            slots = heavy_slots if name in heavy_lanes else threading.BoundedSemaphore(capacity)
+            self.lanes[name] = RenderLane(name, slots, max_queue, timeout)
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Create the pool and make sure every worker process has warmed up"""
+        with self._lock:
+            if self._executor is not None or self.workers <= 0:
+                return
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+            warmups = [self._executor.submit(_noop) for _ in range(self.workers)]
+        for future in warmups:
+            future.result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def render(self, lane_name, renderer, *args):
+        """Run ``renderer(*args)`` in the pool under the admission rules of ``lane_name``"""
+        lane = self.lanes[lane_name]
+        remaining, _ = lane.enter()
+        if self.workers <= 0:
+            # Inline mode (serverless deployments, tests): render on this thread
+            try:
+                return renderer(*args)
+            finally:
+                lane.leave()
+
+        try:
+            self.start()
+            future = self._executor.submit(renderer, *args)
+        except Exception:
+            lane.leave()
+            raise
+        # Free the slot only once the worker process is actually idle again
+        future.add_done_callback(lambda _: lane.leave())
+
+        try:
+            return future.result(timeout=max(remaining, 0))
+        except FutureTimeout:
+            future.cancel()
+            lane.rejected('render_timeout')
+            raise RenderTimeout(f"Rendering {lane.name} took longer than {lane.timeout}s")
+        except BrokenProcessPool:
+            # A worker died (OOM kill, segfault); start a fresh pool next time
+            self.shutdown()
+            raise
+
+    def render_many(self, lane_name, renderer, items):
+        """Render ``renderer(item)`` for every item, in parallel across the lane's free slots
+        
+        Admission happens before this returns (so RenderQueueFull/RenderTimeout
+        can still become an error response); the returned iterator then yields
+        results in completion order.
+        """
+        lane = self.lanes[lane_name]
+        remaining, taken = lane.enter(max_slots=max(1, self.workers))
+        if self.workers <= 0:
+            return self._render_inline(lane, renderer, items, taken)
+        try:
+            self.start()
+        except Exception:
+            lane.leave(taken)
+            raise
+        return self._render_parallel(lane, renderer, items, taken, time.monotonic() + remaining)
+
+    def _render_inline(self, lane, renderer, items, taken):
+        try:
+            for item in items:
+                yield renderer(item)
+        finally:
+            lane.leave(taken)
+
+    def _render_parallel(self, lane, renderer, items, taken, deadline):
+        items = iter(items)
+        pending = set()
+        try:
+            for item in itertools.islice(items, taken):
+                pending.add(self._executor.submit(renderer, item))
+            while pending:
+                done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    lane.rejected('render_timeout')
+                    raise RenderTimeout(f"Rendering {lane.name} took longer than {lane.timeout}s")
+                for future in done:
+                    for item in itertools.islice(items, 1):
+                        pending.add(self._executor.submit(renderer, item))
+                    yield future.result()
+        finally:
+            # Stopped early (timeout, error, client gone): drop queued work and
+            # hand each slot back only once its worker process is idle again
+            running = [future for future in pending if not future.cancel()]
+            lane.leave(taken - len(running))
+            for future in running:
+                future.add_done_callback(lambda _: lane.leave())
+
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """Return this process's render engine, creating it after any fork"""
+    global _engine, _engine_pid
+    with _engine_lock:
+        if _engine is None or _engine_pid != os.getpid():
+            _engine = RenderEngine()
+            _engine_pid = os.getpid()
+        return _engine
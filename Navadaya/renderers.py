@@ -0,0 +1,48 @@
+"""
+Lazy handles on the PDF renderers of pdf_reports.
+
+Importing pdf_reports loads ReportLab, qrcode, PIL and NumPy, roughly half
+of the app's import time, which routes that never render a PDF (``/``,
+``/health``, ``/ready``, static files) should not pay on a cold start.
+main.py passes these handles to the render engine instead of the functions
+themselves: each imports pdf_reports the first time it is called, in
+whichever process runs it, so with the render pool the gunicorn worker
+never imports it at all (the pool processes do, in their initializer).
+Handles pickle by name, so they cross into the pool unchanged.
+"""
+
+import importlib
+import sys
+
+PDF_MODULE = 'pdf_reports'
+
+def load():
+    """Import (once) and return the PDF subsystem"""
+    return importlib.import_module(PDF_MODULE)
+
+def loaded():
+    """Whether this process has imported the PDF subsystem yet"""
+    return PDF_MODULE in sys.modules
+
+class LazyRenderer:
+    """Picklable stand-in for ``pdf_reports.<name>``, imported on first call"""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, *args, **kwargs):
+        return getattr(load(), self.name)(*args, **kwargs)
+
+    def __reduce__(self):
+        return LazyRenderer, (self.name,)
+
+    def __repr__(self):
+        return f"LazyRenderer({self.name!r})"
+
+render_student_report = LazyRenderer('render_student_report')
+render_all_students_report = LazyRenderer('render_all_students_report')
+render_fees_report = LazyRenderer('render_fees_report')
+render_fee_receipt = LazyRenderer('render_fee_receipt')
+render_fee_receipts = LazyRenderer('render_fee_receipts')
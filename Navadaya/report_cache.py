@@ -0,0 +1,151 @@
+"""
+Content-addressed cache of rendered reports.
+
+The reports page POSTs the full students/fees/rooms payload on every click,
+so an unchanged dashboard asks for the same PDF again and again. Reports are
+keyed by a SHA-256 of the canonical JSON payload (sorted keys, volatile
+request-time fields dropped); the key doubles as the response ``ETag``, so a
+client that already holds the PDF gets a 304 for the cost of one hash.
+
+Entries live as files under one directory, like the job store, so every
+gunicorn worker shares them. The cache is bounded by entry count and total
+bytes (least recently used entries go first) and entries expire after a TTL.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from config import get_config
+
+# Bumped whenever report layout changes, so old entries stop matching
+CACHE_FORMAT = 1
+
+# Request-time fields a client may add that do not change the report
+VOLATILE_FIELDS = ('generatedAt', 'requestedAt', 'timestamp')
+
+def payload_key(kind, data):
+    """Hex SHA-256 of the report kind plus its canonical JSON payload"""
+    if isinstance(data, dict):
+        data = {k: v for k, v in data.items() if k not in VOLATILE_FIELDS}
+    canonical = json.dumps([CACHE_FORMAT, kind, data], sort_keys=True, separators=(',', ':'),
+                           ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def etag_for(key):
+    return f'"{key}"'
+
+class ReportCache:
+    """Rendered PDFs and their filenames stored as ``<key>.pdf`` / ``<key>.json``"""
+
+    def __init__(self, directory, ttl, max_entries, max_bytes):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, f"{key}.{suffix}")
+
+    def get(self, key):
+        """Return ``(open PDF file, filename)`` for a live entry, or None"""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(key, 'json')) as f:
+                meta = json.load(f)
+            if time.time() - meta['createdAt'] > self.ttl:
+                self._delete(key)
+                return None
+            pdf_file = open(self._path(key, 'pdf'), 'rb')
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+        # The PDF's mtime is the LRU clock
+        try:
+            os.utime(pdf_file.fileno())
+        except OSError:
+            pass
+        return pdf_file, meta['filename']
+
+    def put(self, key, pdf, filename):
+        """Store a RenderedPDF (spool files are moved in, not copied)
+
+        Returns the stored PDF opened for reading, so the caller can serve it
+        even if a concurrent eviction removes the entry straight away.
+        """
+        tmp_path = f"{self._path(key, 'pdf')}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pdf.save(tmp_path)
+        return self._commit(key, tmp_path, filename)
+
+    def put_file(self, key, path, filename):
+        """Store a finished PDF that already lives on disk, hard-linking when possible"""
+        tmp_path = f"{self._path(key, 'pdf')}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(path, tmp_path)
+        except OSError:
+            shutil.copyfile(path, tmp_path)
+        self._commit(key, tmp_path, filename).close()
+
+    def _commit(self, key, tmp_path, filename):
+        pdf_file = open(tmp_path, 'rb')
+        os.replace(tmp_path, self._path(key, 'pdf'))
+        meta_tmp = f"{self._path(key, 'json')}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(meta_tmp, 'w') as f:
+            json.dump({'filename': filename, 'createdAt': time.time()}, f)
+        os.replace(meta_tmp, self._path(key, 'json'))
+        self.evict()
+        return pdf_file
+
+    def _delete(self, key):
+        for suffix in ('json', 'pdf'):
+            try:
+                os.unlink(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until within bounds"""
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.pdf'):
+                continue
+            key = entry.name[:-len('.pdf')]
+            try:
+                stat = entry.stat()
+                # The metadata file is written once, so its mtime is the creation time
+                created = os.stat(self._path(key, 'json')).st_mtime
+            except FileNotFoundError:
+                continue
+            if now - created > self.ttl:
+                self._delete(key)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, key))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, key = entries.pop(0)
+            self._delete(key)
+            total_bytes -= size
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_report_cache():
+    """Return the report cache configured for this process"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_config()
+            _cache = ReportCache(settings.REPORT_CACHE_DIR, settings.REPORT_CACHE_TTL,
+                                 settings.REPORT_CACHE_MAX_ENTRIES, settings.REPORT_CACHE_MAX_BYTES)
+        return _cache
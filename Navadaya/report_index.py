@@ -0,0 +1,68 @@
+"""
+Hash indexes over report payloads.
+
+Report requests carry plain lists of students, fees and rooms. Looking a
+room up with a linear scan per student made the fees report quadratic in
+hostel size; ``PayloadIndex`` builds each index once, on first use, so
+every lookup after that is O(1).
+"""
+
+from functools import cached_property
+
+from fee_aggregation import aggregate_fees
+
+def _index_first(items, field):
+    """Map ``item[field]`` to the first item carrying that value (like next(...))"""
+    index = {}
+    for item in items:
+        key = item.get(field)
+        if key is not None and key not in index:
+            index[key] = item
+    return index
+
+class PayloadIndex:
+    """Lazily built lookups over the students, fees and rooms of one payload"""
+
+    def __init__(self, students=(), fees=(), rooms=()):
+        self.students = students
+        self.fees = fees
+        self.rooms = rooms
+
+    @cached_property
+    def rooms_by_id(self):
+        return _index_first(self.rooms, 'id')
+
+    @cached_property
+    def students_by_id(self):
+        return _index_first(self.students, 'id')
+
+    @cached_property
+    def students_by_roll(self):
+        return _index_first(self.students, 'rollNumber')
+
+    @cached_property
+    def fees_by_student(self):
+        fees_by_student = {}
+        for fee in self.fees:
+            fees_by_student.setdefault(fee.get('studentId'), []).append(fee)
+        return fees_by_student
+
+    @cached_property
+    def fee_totals(self):
+        return aggregate_fees(self.fees)
+
+    def room_for(self, student):
+        """The room assigned to ``student``, or None"""
+        assigned = student.get('assignedRoom')
+        return self.rooms_by_id.get(assigned) if assigned else None
+
+    def fees_for(self, student_id):
+        return self.fees_by_student.get(student_id, [])
+
+def student_fee_breakdown(index):
+    """Yield ``(student, room_number, FeeTotals)`` for each student, in payload order"""
+    fee_totals = index.fee_totals
+    for student in index.students:
+        room = index.room_for(student)
+        room_number = room.get('roomNumber', 'N/A') if room else 'N/A'
+        yield student, room_number, fee_totals.student(student.get('id'))
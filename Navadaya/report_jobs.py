@@ -0,0 +1,178 @@
+"""
+Asynchronous report jobs backed by a local, file-based result store.
+
+Heavy reports are submitted as jobs: the request returns a job id at once,
+a background thread hands the render to the process pool, and the finished
+PDF lands in the result store where it can be downloaded until its TTL
+expires. All job state lives on disk so any gunicorn worker can answer a
+poll or download for a job started by another.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from admission import get_admission
+from config import get_config
+from render_pool import get_engine
+from report_cache import get_report_cache
+
+class ProgressFile:
+    """Picklable progress callback that records ``done/total`` in a small file"""
+
+    def __init__(self, path, interval=0.5):
+        self.path = path
+        self.interval = interval
+        self._last_write = 0.0
+
+    def __call__(self, done, total):
+        now = time.monotonic()
+        if done < total and now - self._last_write < self.interval:
+            return
+        self._last_write = now
+        _write_json(self.path, {'done': done, 'total': total})
+
+def _write_json(path, payload):
+    """Write JSON atomically so concurrent readers never see a partial file"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+class JobStore:
+    """Job metadata, progress and PDF results kept as files under one directory"""
+
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id, suffix):
+        return os.path.join(self.directory, f"{job_id}.{suffix}")
+
+    def create(self, kind, total):
+        self.evict_expired()
+        job_id = uuid.uuid4().hex
+        self._save(job_id, {
+            'id': job_id,
+            'kind': kind,
+            'status': 'queued',
+            'total': total,
+            'createdAt': time.time(),
+        })
+        return job_id
+
+    def _save(self, job_id, meta):
+        _write_json(self._path(job_id, 'json'), meta)
+
+    def update(self, job_id, **changes):
+        meta = _read_json(self._path(job_id, 'json'))
+        if meta is None:
+            return
+        meta.update(changes)
+        self._save(job_id, meta)
+
+    def get(self, job_id):
+        """Return job metadata with current progress, or None for unknown/expired jobs"""
+        if not job_id.isalnum():
+            return None
+        meta = _read_json(self._path(job_id, 'json'))
+        if meta is None:
+            return None
+        if time.time() - meta['createdAt'] > self.ttl:
+            self.delete(job_id)
+            return None
+        progress = _read_json(self._path(job_id, 'progress')) or {}
+        done = meta['total'] if meta['status'] == 'done' else progress.get('done', 0)
+        meta['progress'] = {'done': done, 'total': meta['total']}
+        return meta
+
+    def progress_callback(self, job_id):
+        return ProgressFile(self._path(job_id, 'progress'))
+
+    def result_path(self, job_id):
+        return self._path(job_id, 'pdf')
+
+    def store_result(self, job_id, pdf):
+        """Move a RenderedPDF into the store (spool files are renamed, not copied)"""
+        tmp_path = f"{self.result_path(job_id)}.tmp"
+        pdf.save(tmp_path)
+        os.replace(tmp_path, self.result_path(job_id))
+
+    def delete(self, job_id):
+        for suffix in ('json', 'progress', 'pdf'):
+            try:
+                os.unlink(self._path(job_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    def evict_expired(self):
+        """Remove every job file older than the TTL"""
+        cutoff = time.time() - self.ttl
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+class JobRunner:
+    """Runs report jobs on background threads that wait on the render pool"""
+
+    def __init__(self, store, threads):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='report-job')
+
+    def submit(self, kind, lane, renderer, data, total, cache_key=None):
+        """Queue a render; with a ``cache_key`` the finished PDF also goes into the report cache"""
+        job_id = self.store.create(kind, total)
+        self._executor.submit(self._run, job_id, lane, renderer, data, total, cache_key)
+        return job_id
+
+    def _run(self, job_id, lane, renderer, data, total, cache_key=None):
+        try:
+            # Jobs queue for their admission lease (staying 'queued') for as long as their lane allows
+            admission = get_admission()
+            with admission.acquire(lane, admission.weight(lane, total), wait=get_engine().lanes[lane].timeout,
+                                   background=True):
+                self.store.update(job_id, status='running', startedAt=time.time())
+                pdf, filename = get_engine().render(
+                    lane, renderer, data, self.store.progress_callback(job_id))
+            self.store.store_result(job_id, pdf)
+            self.store.update(job_id, status='done', filename=filename, size=pdf.size,
+                              finishedAt=time.time())
+        except Exception as e:
+            self.store.update(job_id, status='failed', error=str(e), finishedAt=time.time())
+            return
+
+        cache = get_report_cache()
+        if cache_key and cache.enabled and pdf.size <= cache.max_bytes:
+            try:
+                cache.put_file(cache_key, self.store.result_path(job_id), filename)
+            except OSError:
+                pass  # the job result is already stored; caching is best effort
+
+_runner = None
+_runner_pid = None
+_runner_lock = threading.Lock()
+
+def get_job_runner():
+    """Return this process's job runner, creating it after any fork"""
+    global _runner, _runner_pid
+    with _runner_lock:
+        if _runner is None or _runner_pid != os.getpid():
+            settings = get_config()
+            store = JobStore(settings.REPORT_JOB_DIR, settings.REPORT_JOB_TTL)
+            _runner = JobRunner(store, settings.REPORT_JOB_THREADS)
+            _runner_pid = os.getpid()
+        return _runner
@@ -0,0 +1,147 @@
+"""
+Compressed request bodies and a fast JSON decode path for the API.
+
+Report requests can carry many megabytes of students and fees. Bodies may
+now be uploaded with ``Content-Encoding: gzip`` (js/reports.js gzips large
+bodies with the browser's ``CompressionStream``), ``deflate`` or, when
+the optional ``zstandard`` package is installed, ``zstd``. They are
+decompressed while they are read, in bounded chunks, and reading stops
+with a 413 as soon as the decoded body exceeds ``REQUEST_BODY_MAX_BYTES``,
+so a small compressed upload cannot expand into gigabytes.
+
+The decoded bytes go straight to the JSON decoder picked by
+``JSON_DECODER``: ``orjson`` or ``msgspec`` when installed (``auto`` takes
+the first available), else the standard library. Unlike ``request.json``,
+the raw body is not kept on the request once it has been decoded.
+"""
+
+import gzip
+import json
+import zlib
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional; the stdlib decoder is always available
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - msgspec is optional
+    msgspec = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstd uploads need the optional zstandard package
+    zstandard = None
+
+# Bytes read from the (decompressing) stream at a time
+READ_CHUNK_SIZE = 256 * 1024
+
+class RequestBodyError(Exception):
+    """A request body that cannot be decoded; ``status`` is the HTTP status to answer with"""
+    status = 400
+
+class BodyTooLarge(RequestBodyError):
+    status = 413
+
+class UnsupportedEncoding(RequestBodyError):
+    status = 415
+
+def _json_decoders():
+    decoders = {}
+    if orjson is not None:
+        decoders['orjson'] = orjson.loads
+    if msgspec is not None:
+        decoders['msgspec'] = msgspec.json.decode
+    decoders['json'] = json.loads
+    return decoders
+
+JSON_DECODERS = _json_decoders()
+# orjson's and the stdlib's errors are ValueErrors (as is invalid UTF-8); msgspec has its own
+JSON_ERRORS = (ValueError,) + ((msgspec.DecodeError,) if msgspec is not None else ())
+
+def json_decoder(name='auto'):
+    """``(name, loads)`` of the configured decoder; ``auto`` prefers the fastest installed one"""
+    if name == 'auto':
+        name = next(iter(JSON_DECODERS))
+    if name not in JSON_DECODERS:
+        raise ValueError(f"JSON_DECODER {name!r} is not available (installed: {', '.join(JSON_DECODERS)})")
+    return name, JSON_DECODERS[name]
+
+class _ZlibReader:
+    """File-like zlib (``deflate``) decompressor whose reads never return more than asked for"""
+
+    def __init__(self, raw, chunk_size=READ_CHUNK_SIZE):
+        self.raw = raw
+        self.chunk_size = chunk_size
+        self._decompressor = zlib.decompressobj()
+
+    def read(self, size):
+        while not self._decompressor.eof:
+            data = self._decompressor.unconsumed_tail or self.raw.read(self.chunk_size)
+            # An empty ``data`` still flushes output zlib is holding back
+            output = self._decompressor.decompress(data, size)
+            if output:
+                return output
+            if not data:
+                raise zlib.error('truncated deflate stream')
+        return b''
+
+def _zstd_reader(raw):
+    if zstandard is None:
+        raise UnsupportedEncoding('zstd request bodies need the zstandard package on the server')
+    return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+
+# Corrupt or truncated compressed bodies (gzip raises OSError/EOFError)
+DECOMPRESSION_ERRORS = (OSError, EOFError, zlib.error) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+# Content-Encoding -> function wrapping a readable stream in a decompressing one
+DECODING_READERS = {
+    'gzip': lambda raw: gzip.GzipFile(fileobj=raw, mode='rb'),
+    'x-gzip': lambda raw: gzip.GzipFile(fileobj=raw, mode='rb'),
+    'deflate': _ZlibReader,
+    'zstd': _zstd_reader,
+}
+
+def content_encodings(header):
+    """Codings applied to the body, in the order they were applied (``identity`` dropped)"""
+    codings = [coding.strip().lower() for coding in (header or '').split(',')]
+    return [coding for coding in codings if coding and coding != 'identity']
+
+def read_body(stream, content_encoding=None, max_bytes=None, content_length=None):
+    """Read and decompress a request body into a bytearray, enforcing ``max_bytes`` as it goes"""
+    codings = content_encodings(content_encoding)
+    if max_bytes is not None and not codings and content_length is not None and content_length > max_bytes:
+        raise BodyTooLarge(f"Request body is larger than {max_bytes} bytes")
+    reader = stream
+    for coding in reversed(codings):
+        if coding not in DECODING_READERS:
+            raise UnsupportedEncoding(f"Unsupported Content-Encoding {coding!r} "
+                                      f"(supported: {', '.join(supported_encodings())})")
+        reader = DECODING_READERS[coding](reader)
+
+    body = bytearray()
+    try:
+        while True:
+            chunk = reader.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            body += chunk
+            if max_bytes is not None and len(body) > max_bytes:
+                raise BodyTooLarge(f"Decoded request body is larger than {max_bytes} bytes")
+    except DECOMPRESSION_ERRORS as e:
+        raise RequestBodyError(f"Request body is not valid {', '.join(codings)} data: {e}")
+    return body
+
+def decode_json(body, decoder='auto'):
+    """Decode a JSON body (an empty body is ``None``)"""
+    if not body or body.isspace():
+        return None
+    _, loads = json_decoder(decoder)
+    try:
+        return loads(body)
+    except JSON_ERRORS as e:
+        raise RequestBodyError(f"Request body is not valid JSON: {e}")
+
+def supported_encodings():
+    return [coding for coding in DECODING_READERS if coding != 'zstd' or zstandard is not None]
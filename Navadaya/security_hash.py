@@ -0,0 +1,83 @@
+"""
+Receipt security hash, fixed-width and batchable.
+
+The original ``generate_security_hash`` ran the JavaScript string hash
+``h = (h << 5) - h + ord(c)`` over the receipt fields, but on unbounded
+Python ints (``h & h`` is a no-op), and only reduced the result with
+``abs(h) % 16**12`` at the end. That value is the base-31 polynomial of the
+code points modulo 2**48, and since h never goes negative and 2**48 is a
+power of two, every step can be truncated to 48 bits without changing the
+result:
+
+    h = sum(ord(c) * 31**(n-1-i)) mod 2**48
+
+``security_hash`` evaluates that sum against a table of 31**k mod 2**48
+with ``map``/``sum`` over the encoded string instead of a Python-level
+loop over growing ints, and ``security_hashes`` hashes many receipts at
+once, as one NumPy matrix product when NumPy is available. Products wrap modulo 2**64 in uint64,
+which keeps the low 48 bits exact.
+
+Both reproduce the hashes on receipts that have already been printed.
+Golden values (checked by benchmarks/bench_security_hash.py):
+
+    >>> security_hash(security_string({'student_name': 'Asha Sharma',
+    ...     'roll_number': 'NGH202500001', 'amount': 5000,
+    ...     'fee_type': 'monthly_rent', 'timestamp': 1753869600.0}))
+    253305373155483
+"""
+
+from operator import mul
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is an optional speed-up
+    np = None
+
+SECURITY_SALT = 'NAVADAYA_SECURITY_2025'
+HASH_BITS = 48  # 16**12
+HASH_MASK = (1 << HASH_BITS) - 1
+MULTIPLIER = 31  # (h << 5) - h
+# Smallest batch worth a NumPy round trip (see benchmarks/bench_security_hash.py)
+VECTORIZE_MIN_BATCH = 32
+
+# 31**k mod 2**48, grown on demand to the longest string hashed so far
+_powers = [1]
+
+def _powers_for(length):
+    powers = _powers
+    while len(powers) < length:
+        powers.append(powers[-1] * MULTIPLIER & HASH_MASK)
+    return powers
+
+def security_string(receipt_data):
+    """The string a receipt's security hash is computed over"""
+    return (f"{receipt_data['student_name']}{receipt_data['roll_number']}{receipt_data['amount']}"
+            f"{receipt_data['fee_type']}{receipt_data['timestamp']}{SECURITY_SALT}")
+
+def security_hash(text):
+    """48-bit hash of ``text``, bit-exact with the original unbounded loop"""
+    # Code points as a buffer of ints: one byte each for Latin-1 text, UTF-32 otherwise
+    try:
+        codes = text.encode('latin-1')[::-1]
+    except UnicodeEncodeError:
+        codes = memoryview(text.encode('utf-32-le')).cast('I')[::-1]
+    # Reversed, so the last character lines up with 31**0
+    return sum(map(mul, codes, _powers_for(len(codes)))) & HASH_MASK
+
+def security_hashes(texts, vectorized=None):
+    """Hash many strings at once; ``vectorized`` defaults to NumPy when it is installed"""
+    texts = list(texts)
+    if vectorized is None:
+        vectorized = np is not None and len(texts) >= VECTORIZE_MIN_BATCH
+    if not vectorized:
+        return [security_hash(text) for text in texts]
+    if np is None:
+        raise RuntimeError("NumPy is not installed; use vectorized=False")
+    if not texts:
+        return []
+    width = max(map(len, texts))
+    # Left-padding with NUL code points adds leading zero terms, which leave the sum unchanged
+    padded = ''.join(text.rjust(width, '\0') for text in texts).encode('utf-32-le')
+    codes = np.frombuffer(padded, dtype='<u4').reshape(len(texts), width).astype(np.uint64)
+    powers = np.array(_powers_for(width)[width - 1::-1], dtype=np.uint64)
+    return (codes @ powers & np.uint64(HASH_MASK)).tolist()
@@ -2,44 +2,176 @@
 """
 Simple HTTP server for serving static files
 Girls Hostel Management System
+
+Connections are served concurrently by a pool of worker threads, so one
+slow download no longer blocks everyone else. Responses use HTTP/1.1
+keep-alive (idle connections are closed after --keepalive seconds), file
+bodies are sent with sendfile(2) where the platform has it, and single
+byte ranges (``Range: bytes=...``) are answered with 206.
+
+Usage: python server.py [--port 5000] [--workers 128] [--keepalive 15] [--directory .]
 """
 
+import argparse
 import http.server
-import socketserver
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
 from pathlib import Path
 
-PORT = 5000
+PORT = int(os.environ.get('PORT', 5000))
 DIRECTORY = "."
+WORKERS = int(os.environ.get('SERVER_WORKERS', 128))
+KEEPALIVE_TIMEOUT = 15
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+def parse_range(header, size):
+    """Return ``(start, end)`` (inclusive) for a single byte range, or None to send the whole file"""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None  # Multiple or malformed ranges: a full response is always allowed
+    first, last = match.groups()
+    if first == '':
+        suffix = int(last)
+        if suffix == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = size - 1 if last == '' else min(int(last), size - 1)
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+class PooledHTTPServer(http.server.HTTPServer):
+    """HTTPServer that hands each connection to a fixed pool of worker threads"""
+
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+    def __init__(self, server_address, handler_class, workers=WORKERS):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http-worker')
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
 class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Idle keep-alive connections (and stalled clients) give their worker back after this long
+    timeout = KEEPALIVE_TIMEOUT
+
     def __init__(self, *args, **kwargs):
+        self._range_length = None
+        self._file_response = False
         super().__init__(*args, directory=DIRECTORY, **kwargs)
-    
+
     def end_headers(self):
         # Add CORS headers for development
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', '*')
+        if self._file_response:
+            self.send_header('Accept-Ranges', 'bytes')
         super().end_headers()
-    
+
     def do_OPTIONS(self):
         self.send_response(200)
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
+    def send_head(self):
+        """Serve a single byte range with 206; everything else as SimpleHTTPRequestHandler does"""
+        self._range_length = None
+        path = self.translate_path(self.path)
+        self._file_response = os.path.isfile(path)
+        range_header = self.headers.get('Range')
+        if not range_header or not self._file_response:
+            return super().send_head()
+
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        try:
+            fs = os.fstat(f.fileno())
+            last_modified = self.date_time_string(fs.st_mtime)
+            if_range = self.headers.get('If-Range')
+            byte_range = parse_range(range_header, fs.st_size) if if_range in (None, last_modified) else None
+        except RangeNotSatisfiable:
+            f.close()
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header('Content-Range', f"bytes */{fs.st_size}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+        except Exception:
+            f.close()
+            raise
+        if byte_range is None:
+            f.close()
+            return super().send_head()
+
+        start, end = byte_range
+        self.send_response(HTTPStatus.PARTIAL_CONTENT)
+        self.send_header('Content-type', self.guess_type(path))
+        self.send_header('Content-Range', f"bytes {start}-{end}/{fs.st_size}")
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        f.seek(start)
+        self._range_length = end - start + 1
+        return f
+
+    def copyfile(self, source, outputfile):
+        """Send the file body with sendfile(2) (zero-copy) from its current offset"""
+        try:
+            self.connection.sendfile(source, source.tell(), self._range_length)
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            # The client went away or stalled; nothing more can be sent on this connection
+            self.close_connection = True
+
 def main():
-    os.chdir(DIRECTORY)
-    
-    with socketserver.TCPServer(("0.0.0.0", PORT), CustomHTTPRequestHandler) as httpd:
+    parser = argparse.ArgumentParser(description="Static file server for the hostel management system")
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--bind', default='0.0.0.0')
+    parser.add_argument('--workers', type=int, default=WORKERS, help="worker threads (concurrent connections)")
+    parser.add_argument('--keepalive', type=float, default=KEEPALIVE_TIMEOUT,
+                        help="seconds an idle keep-alive connection is kept open")
+    parser.add_argument('--directory', default=DIRECTORY, help="directory to serve")
+    args = parser.parse_args()
+
+    CustomHTTPRequestHandler.timeout = args.keepalive
+    os.chdir(args.directory)
+
+    with PooledHTTPServer((args.bind, args.port), CustomHTTPRequestHandler, args.workers) as httpd:
         print(f"🏨 Girls Hostel Management System")
-        print(f"🌐 Server running at http://0.0.0.0:{PORT}")
+        print(f"🌐 Server running at http://{args.bind}:{args.port} ({args.workers} workers)")
         print(f"📁 Serving files from: {Path(DIRECTORY).absolute()}")
         print("Press Ctrl+C to stop the server")
-        
+
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\n👋 Server stopped")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Precompressed, fingerprinted static assets.
+
+Text assets (HTML, CSS, JS, ...) are hashed once per process and compressed
+with gzip and, when the optional ``brotli`` package is installed, brotli.
+The compressed variants are written to ``STATIC_CACHE_DIR`` named by content
+hash, so every worker (and every restart) reuses them; gunicorn.conf.py
+builds them all when the server starts, and ``python static_assets.py``
+does the same at image build time.
+
+Responses pick the best variant the client accepts, carry a strong ETag per
+variant and ``Vary: Accept-Encoding``. HTML pages are served with their
+local ``<script src>``/``<link href>`` references rewritten to fingerprinted
+names (``js/fees.3f2a9c01be.js``); those URLs are cacheable forever
+(``immutable``), while pages and plain asset URLs are revalidated with
+their ETag on every use. Files are re-hashed when their mtime changes, so
+edits show up without a restart.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+
+from werkzeug.security import safe_join
+
+from config import get_config
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE = {'.html', '.css', '.js', '.json', '.svg', '.txt', '.xml', '.map'}
+# Asset types whose references in HTML are rewritten to fingerprinted names
+FINGERPRINTED = {'.css', '.js'}
+# Smaller files are not worth a compressed variant
+MIN_COMPRESS_SIZE = 512
+# Directories never served through the pipeline
+SKIP_DIRS = {'__pycache__', 'benchmarks', 'node_modules'}
+FINGERPRINT_LENGTH = 10
+
+FINGERPRINT_RE = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[A-Za-z0-9]+)$' % FINGERPRINT_LENGTH)
+REFERENCE_RE = re.compile(r'(\b(?:src|href)=["\'])([^"\'#?:$]+\.(?:css|js))(["\'])')
+
+def _compressors():
+    compressors = {'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressors['br'] = lambda data: brotli.compress(data, quality=11)
+    return compressors
+
+# Preferred first when the client accepts several
+ENCODINGS = ('br', 'gzip')
+
+class Asset:
+    """One static file: its digest, mimetype and the paths of its encoded variants"""
+
+    __slots__ = ('name', 'version', 'digest', 'mimetype', 'variants', 'dependencies')
+
+    def __init__(self, name, version, digest, mimetype, variants, dependencies):
+        self.name = name
+        self.version = version
+        self.digest = digest
+        self.mimetype = mimetype
+        self.variants = variants  # encoding ('identity', 'gzip', 'br') -> file path
+        self.dependencies = dependencies  # referenced asset -> digest it had when this was built
+
+    @property
+    def fingerprint(self):
+        return self.digest[:FINGERPRINT_LENGTH]
+
+    def etag(self, encoding):
+        return self.digest if encoding == 'identity' else f"{self.digest}-{encoding}"
+
+    def negotiate(self, accept_encodings):
+        """Best encoding both sides support, falling back to identity"""
+        for encoding in ENCODINGS:
+            if encoding in self.variants and accept_encodings[encoding]:
+                return encoding
+        return 'identity'
+
+class StaticAssets:
+    """Manifest of the text assets under ``root``"""
+
+    def __init__(self, root, cache_dir):
+        self.root = os.path.abspath(root)
+        self.cache_dir = cache_dir
+        self.compressors = _compressors()
+        self._assets = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, name):
+        """The asset for a root-relative path, (re)built when missing or stale; None if not servable"""
+        name = posixpath.normpath(name)
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE or set(name.split('/')[:-1]) & SKIP_DIRS:
+            return None
+        source = safe_join(self.root, name)
+        if source is None:
+            return None
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        asset = self._assets.get(name)
+        if asset is not None and asset.version == (stat.st_mtime_ns, stat.st_size) and self._current(asset):
+            return asset
+        asset = self._build(name, source, stat)
+        with self._lock:
+            self._assets[name] = asset
+        return asset
+
+    def resolve(self, name):
+        """Map a request path to ``(asset, immutable)``; fingerprinted names are immutable"""
+        match = FINGERPRINT_RE.match(name)
+        if match:
+            asset = self.get(match['stem'] + match['ext'])
+            if asset is not None:
+                # A stale fingerprint (page cached across a deploy) still gets the current file, revalidated
+                return asset, asset.fingerprint == match['hash']
+        return self.get(name), False
+
+    def build_all(self, prune=True):
+        """Hash and compress every asset under the root; returns how many were built
+        
+        With ``prune`` the variants of content that no longer exists (earlier
+        deploys, edited files) are removed from the cache directory.
+        """
+        digests = set()
+        for directory, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+            for filename in files:
+                name = os.path.relpath(os.path.join(directory, filename), self.root).replace(os.sep, '/')
+                asset = self.get(name)
+                if asset is not None:
+                    digests.add(asset.digest)
+        if prune:
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.split('.', 1)[0] not in digests:
+                    try:
+                        os.unlink(entry.path)
+                    except FileNotFoundError:
+                        pass
+        return len(digests)
+
+    def _current(self, asset):
+        """Whether every asset a page references still has the fingerprint it was rewritten with"""
+        for name, digest in asset.dependencies.items():
+            dependency = self.get(name)
+            if dependency is None or dependency.digest != digest:
+                return False
+        return True
+
+    def _build(self, name, source, stat):
+        with open(source, 'rb') as f:
+            content = f.read()
+        dependencies = {}
+        if name.endswith('.html'):
+            content = self._rewrite_references(name, content, dependencies)
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        ext = os.path.splitext(name)[1].lower()
+        variants = {'identity': source}
+        if name.endswith('.html'):
+            variants['identity'] = self._store(digest, ext, content, lambda data: data)
+        if len(content) >= MIN_COMPRESS_SIZE:
+            for encoding, compress in self.compressors.items():
+                path = self._store(digest, f"{ext}.{encoding}", content, compress, max_size=len(content) * 0.95)
+                if path is not None:
+                    variants[encoding] = path
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        return Asset(name, (stat.st_mtime_ns, stat.st_size), digest, mimetype, variants, dependencies)
+
+    def _store(self, digest, suffix, content, encode, max_size=None):
+        """Write an encoded variant once, named by content hash; None if it would not be smaller"""
+        path = os.path.join(self.cache_dir, f"{digest}{suffix}")
+        skip_path = f"{path}.skip"
+        if os.path.exists(path):
+            return path
+        if os.path.exists(skip_path):
+            return None
+        data = encode(content)
+        target = path if max_size is None or len(data) <= max_size else skip_path
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data if target == path else b'')
+        os.replace(tmp_path, target)
+        return path if target == path else None
+
+    def _rewrite_references(self, name, content, dependencies):
+        """Point a page's local CSS/JS references at fingerprinted names"""
+        directory = posixpath.dirname(name)
+        text = content.decode('utf-8')
+
+        def fingerprint(match):
+            reference = match[2]
+            target = posixpath.normpath(posixpath.join(directory, reference))
+            asset = self.get(target) if os.path.splitext(target)[1] in FINGERPRINTED else None
+            if asset is None:
+                return match[0]
+            dependencies[target] = asset.digest
+            stem, ext = posixpath.splitext(reference)
+            return f"{match[1]}{stem}.{asset.fingerprint}{ext}{match[3]}"
+
+        return REFERENCE_RE.sub(fingerprint, text).encode('utf-8')
+
+_assets = None
+_assets_lock = threading.Lock()
+
+def get_static_assets():
+    global _assets
+    with _assets_lock:
+        if _assets is None:
+            settings = get_config()
+            _assets = StaticAssets(settings.STATIC_ROOT, settings.STATIC_CACHE_DIR)
+        return _assets
+
+if __name__ == '__main__':
+    built = get_static_assets().build_all()
+    print(f"Precompressed {built} static assets into {get_config().STATIC_CACHE_DIR}"
+          f" ({', '.join(sorted(_compressors()))})")
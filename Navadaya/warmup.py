@@ -0,0 +1,143 @@
+"""
+Worker warm-up and readiness.
+
+A freshly booted gunicorn worker answers ``/health`` at once, but its first
+PDF request used to pay for starting the render pool, ReportLab's font and
+layout initialisation, the QR encoder and PIL. gunicorn.conf.py now starts
+a warm-up in every worker as soon as it has loaded the app: it starts the
+render pool (whose processes render a throwaway receipt and student report
+in their initializer, see ``pdf_reports.warm_up``), or renders them inline
+when the pool is disabled, opens the receipt ledger and loads the dataset
+snapshot.
+
+``/ready`` stays 503 until this worker has warmed up *and* every worker of
+the server has, so a rolling deploy only sends traffic to an instance once
+it can render at full speed. ``/health`` remains a plain liveness check.
+Workers mark themselves ready with a file in ``WARMUP_STATE_DIR``;
+gunicorn.conf.py clears the directory on start and removes the marker of
+a worker that exits. Outside gunicorn (``python main.py``, serverless) the
+first ``/ready`` request starts the warm-up and the instance counts as a
+single worker.
+"""
+
+import os
+import threading
+import time
+
+from config import get_config
+
+PENDING, WARMING, READY, FAILED = 'pending', 'warming', 'ready', 'failed'
+
+def _warm_renderers():
+    from render_pool import get_engine
+    engine = get_engine()
+    if engine.workers > 0:
+        engine.start()
+    else:
+        import pdf_reports
+        pdf_reports.warm_up()
+
+def _warm_ledger():
+    from receipt_ledger import get_receipt_ledger
+    get_receipt_ledger().connection
+
+def _warm_dataset():
+    from dataset import get_dataset
+    get_dataset().refresh()
+
+# (name, step) in the order they run
+WARMUP_STEPS = (
+    ('renderers', _warm_renderers),
+    ('ledger', _warm_ledger),
+    ('dataset', _warm_dataset),
+)
+
+def marker_path(state_dir, pid):
+    return os.path.join(state_dir, f"{pid}.ready")
+
+def remove_marker(state_dir, pid):
+    try:
+        os.unlink(marker_path(state_dir, pid))
+    except FileNotFoundError:
+        pass
+
+class Warmup:
+    """Runs the warm-up steps once, in the background, and reports readiness"""
+
+    def __init__(self, state_dir, expected_workers=1, steps=WARMUP_STEPS):
+        self.state_dir = state_dir
+        self.expected_workers = expected_workers
+        self.steps = steps
+        self.state = PENDING
+        self.error = None
+        self.timings = {}
+        self._thread = None
+        self._lock = threading.Lock()
+        os.makedirs(state_dir, exist_ok=True)
+
+    def start(self):
+        """Start warming up on a background thread (only the first call does anything)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.state = WARMING
+            self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout=None):
+        """Block until the warm-up has finished; returns whether this worker is ready"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.state == READY
+
+    def run(self):
+        self.state = WARMING
+        try:
+            for name, step in self.steps:
+                started = time.perf_counter()
+                step()
+                self.timings[name] = round(time.perf_counter() - started, 3)
+            with open(marker_path(self.state_dir, os.getpid()), 'w') as f:
+                f.write(str(time.time()))
+            self.state = READY
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.state = FAILED
+
+    def ready_workers(self):
+        try:
+            return sum(1 for name in os.listdir(self.state_dir) if name.endswith('.ready'))
+        except FileNotFoundError:
+            return 0
+
+    def status(self):
+        """``(ready, body)`` for the readiness endpoint"""
+        ready_workers = self.ready_workers()
+        body = {
+            'status': self.state,
+            'pid': os.getpid(),
+            'workersReady': ready_workers,
+            'workersExpected': self.expected_workers,
+            'timings': self.timings,
+        }
+        if self.error:
+            body['error'] = self.error
+        ready = self.state == READY and ready_workers >= self.expected_workers
+        if self.state == READY and not ready:
+            body['status'] = 'waiting_for_workers'
+        return ready, body
+
+_warmup = None
+_warmup_pid = None
+_warmup_lock = threading.Lock()
+
+def get_warmup(expected_workers=None):
+    """Return this process's warm-up state, starting fresh after any fork"""
+    global _warmup, _warmup_pid
+    with _warmup_lock:
+        if _warmup is None or _warmup_pid != os.getpid():
+            _warmup = Warmup(get_config().WARMUP_STATE_DIR)
+            _warmup_pid = os.getpid()
+        if expected_workers is not None:
+            _warmup.expected_workers = expected_workers
+        return _warmup